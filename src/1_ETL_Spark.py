@@ -1,7 +1,27 @@
+import json
+import os
+
 import pyspark as ps
+from pyspark import StorageLevel
 from pyspark.sql import functions as F
 from pyspark.sql.types import TimestampType, ArrayType
 
+from columnar_store import (
+    columnar_base_path,
+    read_spark_table,
+    table_path,
+    write_spark_table,
+)
+from friend_centrality import centrality_columns, centrality_table
+from id_encoding import (
+    add_spark_keys,
+    build_spark_id_map,
+    id_map_table,
+    read_spark_id_map,
+    replace_spark_ids,
+)
+from yelp_schemas import check_spark_sample, spark_schema
+
 # Setting Up Spark
 
 spark = (
@@ -9,6 +29,8 @@ spark = (
     .config(
         "spark.driver.extraClassPath", "/home/ubuntu/postgresql-42.2.20.jar"
     )
+    .config("spark.sql.adaptive.enabled", "true")
+    .config("spark.sql.adaptive.skewJoin.enabled", "true")
     .master("local[7]")
     .getOrCreate()
 )
@@ -20,9 +42,96 @@ sc = spark.sparkContext
 data_location = "/home/ubuntu/yelp_2021/data/"
 filename_prefix = "yelp_academic_dataset_"
 
+# Options: "full" - Rebuild every table from scratch.
+#          "incremental" - Only process reviews not loaded by earlier runs,
+#                          i.e. newer than the watermark or at the
+#                          watermark but not yet seen, and append them
+#                          to their split.
+etl_mode = "full"
+etl_manifest_path = data_location + "etl_manifest.json"
+
+# Options: "int" - Replace review_id, user_id and business_id with dense
+#                  integer keys in every output table. The string ids are
+#                  saved in *_id_map tables for lookups at export.
+#          "string" - Keep the original 22 character ids.
+id_encoding = "int"
+
+
+def read_yelp_json(file):
+    """
+    Reads a Yelp json file with its registered schema.
+    Skips Spark's schema inference pass over the whole file
+    and fails fast if the file has drifted from the registry.
+
+    Args:
+        file (str): Identifying suffix of yelp json file.
+
+    Returns:
+        Spark Dataframe: Contents of the json file.
+    """
+    filepath = data_location + filename_prefix + f"{file}.json"
+    check_spark_sample(spark, file, filepath)
+    return (
+        spark.read.schema(spark_schema(file))
+        .option("mode", "FAILFAST")
+        .json(filepath)
+    )
+
+
+def load_review_watermark():
+    """
+    Loads the newest review_date processed by the last successful run
+    and the review_ids loaded at exactly that review_date. Reviews
+    sharing the watermark timestamp can arrive in a later dump.
+
+    Returns:
+        tuple: Watermark timestamp (str) and its review_ids (list of str).
+               (None, []) if no run has completed.
+    """
+    if not os.path.exists(etl_manifest_path):
+        return None, []
+    with open(etl_manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("id_encoding", "string") != id_encoding:
+        raise ValueError(
+            f"Existing tables use {manifest.get('id_encoding', 'string')} "
+            f"ids, this run uses {id_encoding} ids. Run in full mode."
+        )
+    return (
+        manifest.get("review_date_watermark"),
+        manifest.get("watermark_review_ids", []),
+    )
+
+
+def save_review_watermark(watermark, watermark_review_ids, record_count):
+    """
+    Records a successful run in the ETL manifest.
+
+    Args:
+        watermark (str): Newest review_date loaded so far.
+        watermark_review_ids (list of str): review_ids loaded so far
+            whose review_date equals the watermark.
+        record_count (int): Number of reviews processed in the run.
+    """
+    manifest = {"review_date_watermark": None, "runs": []}
+    if os.path.exists(etl_manifest_path):
+        with open(etl_manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    manifest["review_date_watermark"] = watermark
+    manifest["watermark_review_ids"] = watermark_review_ids
+    manifest["id_encoding"] = id_encoding
+    manifest["runs"].append(
+        {"mode": etl_mode, "watermark": watermark, "records": record_count}
+    )
+    # Replaced atomically so a crash mid write never truncates it.
+    with open(f"{etl_manifest_path}.tmp", "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(f"{etl_manifest_path}.tmp", etl_manifest_path)
+
+
 # Checkin DataPrep
 
-df_checkin = spark.read.json(data_location + filename_prefix + "checkin.json")
+df_checkin = read_yelp_json("checkin")
 df_checkin_2 = df_checkin.withColumn(
     "date_array",
     F.split(df_checkin.date, ",").cast(ArrayType(TimestampType())),
@@ -40,7 +149,7 @@ df_checkin_final = spark.sql(
 
 # User DataPrep
 
-df_user = spark.read.json(data_location + filename_prefix + "user.json")
+df_user = read_yelp_json("user")
 df_user.createOrReplaceTempView("df_user")
 df_user_1 = spark.sql(
     """
@@ -85,16 +194,34 @@ df_user_final = spark.sql(
                 WHEN size(elite_array) = 1
                     AND element_at(elite_array, 1) = "" THEN 0
                 ELSE int(array_max(elite_array))
-            END AS elite_max
+            END AS elite_max,
+            aggregate(
+                filter(elite_array, y -> int(y) BETWEEN 2004 AND 2021),
+                0,
+                (mask, y) -> mask | shiftleft(1, int(y) - 2004)
+            ) AS elite_mask
         FROM df_user_1
     """
 )
 
+# Options: True - Join the friend graph centrality features written by
+#                 friend_centrality.py onto the users.
+#          False - Skip them.
+use_user_centrality = False
+user_graph_columns = centrality_columns if use_user_centrality else []
+# Column lists spliced into the review level selects below.
+user_graph_select = "".join(f"u.{c}, " for c in user_graph_columns)
+user_graph_fields = "".join(f"{c}, " for c in user_graph_columns)
+if use_user_centrality:
+    df_user_final = df_user_final.join(
+        read_spark_table(spark, centrality_table),
+        on="user_id",
+        how="left",
+    )
+
 # Business DataPrep
 
-df_business = spark.read.json(
-    data_location + filename_prefix + "business.json"
-)
+df_business = read_yelp_json("business")
 df_business.createOrReplaceTempView("df_business")
 df_business_final = spark.sql(
     """
@@ -110,7 +237,7 @@ df_business_final = spark.sql(
 )
 # Review DataPrep
 
-df_review = spark.read.json(data_location + filename_prefix + "review.json")
+df_review = read_yelp_json("review")
 df_review.createOrReplaceTempView("df_review")
 df_review_final = spark.sql(
     """
@@ -141,26 +268,127 @@ df_review_final = spark.sql(
 df_checkin_final.createOrReplaceTempView("df_checkin_final")
 df_user_final.createOrReplaceTempView("df_user_final")
 df_business_final.createOrReplaceTempView("df_business_final")
-df_review_final.createOrReplaceTempView("df_review_final")
 
-all_data = spark.sql(
+# Incremental runs only join reviews not loaded before against the
+# current user, business and checkin snapshots. Everything older than
+# the watermark was loaded. At the watermark itself only the review_ids
+# recorded in the manifest were, so the rest are picked up.
+review_watermark, watermark_review_ids = None, []
+if etl_mode == "incremental":
+    review_watermark, watermark_review_ids = load_review_watermark()
+    print(f"Review Watermark: {review_watermark}")
+    if review_watermark is not None:
+        df_review_final = df_review_final.where(
+            F.col("review_date") >= F.to_timestamp(F.lit(review_watermark))
+        )
+    if watermark_review_ids:
+        loaded_ids = spark.createDataFrame(
+            [(review_id,) for review_id in watermark_review_ids],
+            ["review_id"],
+        )
+        df_review_final = df_review_final.join(
+            F.broadcast(loaded_ids), on="review_id", how="left_anti"
+        )
+
+# Options: "broadcast" - Broadcast the combined business/checkin dimension.
+#                        Reviews are only shuffled for the user join,
+#                        so mega-businesses cannot skew a shuffle.
+#          "shuffle" - Plain sort merge joins for every dimension.
+# Skewed partitions in any remaining shuffle join (prolific users)
+# are split by adaptive query execution (spark.sql.adaptive.skewJoin).
+join_strategy = "broadcast"
+show_join_plan = True
+
+# Business and checkin are both one row per business,
+# so they are combined into a single dimension before the review join.
+df_business_checkin = spark.sql(
+    """
+        SELECT COALESCE(b.business_id, c.business_id) AS business_id,
+            b.latitude,
+            b.longitude,
+            b.postal_code,
+            b.state,
+            b.stars,
+            b.review_count,
+            c.num_checkins,
+            c.checkin_min,
+            c.checkin_max
+        FROM df_business_final AS b
+        FULL OUTER JOIN df_checkin_final AS c
+        ON b.business_id = c.business_id
+    """
+)
+df_business_checkin.createOrReplaceTempView("df_business_checkin")
+
+# Dense integer keys, one per id. Incremental runs extend the saved maps.
+id_maps = {}
+
+
+def build_id_map(id_column, *dfs):
+    """
+    Keys every id of id_column found in dfs and keeps the map of
+    newly keyed ids for saving.
+
+    Args:
+        id_column (str): review_id, user_id or business_id.
+        *dfs (Spark Dataframes): Contain id_column.
+
+    Returns:
+        Spark Dataframe: Map of every id in dfs and the saved map.
     """
-        SELECT r.review_id,
+    ids = dfs[0].select(id_column)
+    for df in dfs[1:]:
+        ids = ids.unionByName(df.select(id_column))
+    existing = None
+    if etl_mode == "incremental":
+        existing = read_spark_id_map(spark, id_column)
+    id_map, id_maps[id_column] = build_spark_id_map(ids, id_column, existing)
+    return id_map
+
+
+# Every key is added on the review side of the join, so a review keeps
+# its user and business keys even when the user or business is missing
+# from the snapshots. The user and business maps also cover the ids of
+# the snapshots.
+if id_encoding == "int":
+    id_sources = {
+        "review_id": [df_review_final],
+        "user_id": [df_review_final, df_user_final],
+        "business_id": [df_review_final, df_business_checkin],
+    }
+    for id_column, dfs in id_sources.items():
+        df_review_final = add_spark_keys(
+            df_review_final, build_id_map(id_column, *dfs), id_column
+        )
+    df_review_final.createOrReplaceTempView("df_review_final")
+
+key_select = (
+    "r.review_key, r.user_key, r.business_key," if id_encoding == "int" else ""
+)
+
+join_hint = "/*+ BROADCAST(bc) */" if join_strategy == "broadcast" else ""
+
+all_data = spark.sql(
+    f"""
+        SELECT {join_hint} r.review_id,
             r.user_id,
             r.business_id,
-            b.latitude AS biz_latitude,
-            b.longitude AS biz_longitude,
-            b.postal_code AS biz_postal_code,
-            b.state AS biz_state,
-            b.stars AS biz_avg_stars,
-            b.review_count AS biz_review_count,
-            c.num_checkins AS biz_checkin_count,
-            c.checkin_min AS biz_min_checkin_date,
-            c.checkin_max AS biz_max_checkin_date,
+            {key_select}
+            bc.latitude AS biz_latitude,
+            bc.longitude AS biz_longitude,
+            bc.postal_code AS biz_postal_code,
+            bc.state AS biz_state,
+            bc.stars AS biz_avg_stars,
+            bc.review_count AS biz_review_count,
+            bc.num_checkins AS biz_checkin_count,
+            bc.checkin_min AS biz_min_checkin_date,
+            bc.checkin_max AS biz_max_checkin_date,
             u.yelping_since AS user_yelping_since,
+            {user_graph_select}
             u.elite_count AS user_elite_count,
             u.elite_min AS user_elite_min,
             u.elite_max AS user_elite_max,
+            u.elite_mask AS user_elite_mask,
             u.average_stars AS user_avg_stars,
             u.review_count AS user_review_count,
             u.fans AS user_fan_count,
@@ -175,28 +403,87 @@ all_data = spark.sql(
         FROM df_review_final AS r
         LEFT JOIN df_user_final AS u
         ON r.user_id = u.user_id
-        LEFT JOIN df_business_final AS b
-        ON r.business_id = b.business_id
-        LEFT JOIN df_checkin_final AS c
-        ON r.business_id = c.business_id
+        LEFT JOIN df_business_checkin AS bc
+        ON r.business_id = bc.business_id
     """
 )
 
-all_data.createOrReplaceTempView("all_data")
-
-print(f"All Data Records: {all_data.count()}")
+if show_join_plan:
+    print(f"Join Strategy: {join_strategy}")
+    all_data.explain()
 
 # Split Data Into Train, Test and Holdout Sets
 
-working_data, holdout_data = all_data.randomSplit([0.8, 0.2], seed=12345)
+# Each review is assigned to a split by a hash of its review_id
+# so assignments are identical across reruns and data refreshes.
+# Buckets out of 1000: holdout 20%, test 16% (20% of the working 80%),
+# train 64%.
+split_buckets = 1000
+holdout_buckets = 200
+test_buckets = 360
+
+all_data = all_data.withColumn(
+    "data_split",
+    F.expr(
+        f"""
+            CASE
+                WHEN pmod(xxhash64(review_id), {split_buckets})
+                    < {holdout_buckets} THEN "holdout"
+                WHEN pmod(xxhash64(review_id), {split_buckets})
+                    < {test_buckets} THEN "test"
+                ELSE "train"
+            END
+        """
+    ),
+)
 
-print(f"Working Data Records: {working_data.count()}")
-print(f"Holdout Data Records: {holdout_data.count()}")
+# The four way join is run once and reused by every split below.
+all_data = all_data.persist(StorageLevel.MEMORY_AND_DISK)
+persisted_data = all_data
 
-train_data, test_data = working_data.randomSplit([0.8, 0.2], seed=12345)
+split_stats = (
+    all_data.groupBy("data_split")
+    .agg(
+        F.count("*").alias("count"),
+        F.max("review_date").alias("max_review_date"),
+    )
+    .collect()
+)
+split_counts = {row["data_split"]: row["count"] for row in split_stats}
+new_watermark = max(
+    (row["max_review_date"] for row in split_stats), default=None
+)
+if new_watermark is not None:
+    new_watermark_ids = [
+        row["review_id"]
+        for row in all_data.where(F.col("review_date") == F.lit(new_watermark))
+        .select("review_id")
+        .collect()
+    ]
+    if new_watermark.isoformat(sep=" ") == review_watermark:
+        watermark_review_ids = watermark_review_ids + new_watermark_ids
+    else:
+        review_watermark = new_watermark.isoformat(sep=" ")
+        watermark_review_ids = new_watermark_ids
+
+# The split and the watermark ids use the string review_id above,
+# so switching id_encoding never moves a review between splits.
+if id_encoding == "int":
+    all_data = replace_spark_ids(all_data)
+all_data.createOrReplaceTempView("all_data")
+
+print(f"All Data Records: {sum(split_counts.values())}")
+print(
+    "Working Data Records: "
+    f"{split_counts.get('train', 0) + split_counts.get('test', 0)}"
+)
+print(f"Holdout Data Records: {split_counts.get('holdout', 0)}")
+print(f"Train Records: {split_counts.get('train', 0)}")
+print(f"Test Records: {split_counts.get('test', 0)}")
 
-print(f"Train Records: {train_data.count()}")
-print(f"Test Records: {test_data.count()}")
+train_data = all_data.where("data_split = 'train'").drop("data_split")
+test_data = all_data.where("data_split = 'test'").drop("data_split")
+holdout_data = all_data.where("data_split = 'holdout'").drop("data_split")
 
 # Split Data Into Text and Non-Text
 
@@ -225,11 +512,8 @@ text_data_test = spark.sql(
     """
 )
 
-print(f"Text Train Records: {text_data_train.count()}")
-print(f"Text Test Records: {text_data_test.count()}")
-
 non_text_data_train = spark.sql(
-    """
+    f"""
         SELECT review_id,
             user_id,
             business_id,
@@ -252,7 +536,9 @@ non_text_data_train = spark.sql(
             user_elite_count,
             user_elite_max,
             user_elite_min,
+            user_elite_mask,
             user_yelping_since,
+            {user_graph_fields}
             target_ufc_bool,
             target_ufc_count
         FROM train_data
@@ -260,7 +546,7 @@ non_text_data_train = spark.sql(
 )
 
 non_text_data_test = spark.sql(
-    """
+    f"""
         SELECT review_id,
             user_id,
             business_id,
@@ -283,15 +569,98 @@ non_text_data_test = spark.sql(
             user_elite_count,
             user_elite_max,
             user_elite_min,
+            user_elite_mask,
             user_yelping_since,
+            {user_graph_fields}
             target_ufc_bool,
             target_ufc_count
         FROM test_data
     """
 )
 
-print(f"Non-Text Train Records: {non_text_data_train.count()}")
-print(f"Non-Text Test Records: {non_text_data_test.count()}")
+# Save Split Data
+
+split_tables = {
+    "text_data_train": text_data_train,
+    "text_data_test": text_data_test,
+    "non_text_data_train": non_text_data_train,
+    "non_text_data_test": non_text_data_test,
+    "holdout_data": holdout_data,
+}
+
+# Options: "jdbc" - AWS RDS only, "parquet" - local columnar store only,
+#          "both" - write to both.
+output_mode = "jdbc"
+
+# Incremental runs append so existing rows are left untouched.
+# The hash based split sends each new review to the same split
+# a full rebuild would have.
+write_mode = "append" if etl_mode == "incremental" else "overwrite"
+
+# Id maps are always saved to the columnar store,
+# incremental runs read the existing keys back from it.
+id_map_tables = {
+    id_map_table(id_column): id_map for id_column, id_map in id_maps.items()
+}
+
+# Id column of every saved table.
+table_ids = {table_name: "review_id" for table_name in split_tables}
+table_ids.update({id_map_table(id_column): id_column for id_column in id_maps})
+
+
+def unwritten_rows(df, written, id_column):
+    """
+    Drops the rows of df already saved to a table. The manifest is only
+    updated after every append, so a run that crashed part way through
+    leaves rows behind that the next run would append again.
+
+    Args:
+        df (Spark Dataframe): Rows to append.
+        written (Spark Dataframe or None): Table being appended to,
+            None if it doesn't exist yet.
+        id_column (str): Column identifying a row.
+
+    Returns:
+        Spark Dataframe
+    """
+    if write_mode != "append" or written is None:
+        return df
+    return df.join(written.select(id_column), on=id_column, how="left_anti")
+
+
+def read_written_parquet(table_name, base_path=columnar_base_path):
+    """
+    Saved Parquet table, None if it doesn't exist yet.
+    """
+    path = table_path(table_name, base_path)
+    if not os.path.exists(path):
+        return None
+    return spark.read.parquet(path)
+
+
+# Save Split Data To Local Columnar Store
+
+for table_name, df in id_map_tables.items():
+    write_spark_table(
+        unwritten_rows(
+            df, read_written_parquet(table_name), table_ids[table_name]
+        ),
+        table_name,
+        mode=write_mode,
+    )
+
+if output_mode in ("parquet", "both"):
+    for table_name, df in split_tables.items():
+        written = read_written_parquet(table_name, columnar_base_path)
+        write_spark_table(
+            unwritten_rows(df, written, table_ids[table_name]),
+            table_name,
+            mode=write_mode,
+            base_path=columnar_base_path,
+        )
+        print(
+            f"Saved {table_name} to {table_path(table_name, columnar_base_path)}"
+        )
 
 # Save Split Data To AWS RDS
 
@@ -303,35 +672,46 @@ db_properties = {
 db_endpoint = None
 db_url = f"jdbc:postgresql://{db_endpoint}/yelp_2021_db"
 
-text_data_train.write.jdbc(
-    url=db_url,
-    table="text_data_train",
-    mode="overwrite",
-    properties=db_properties,
-)
-text_data_test.write.jdbc(
-    url=db_url,
-    table="text_data_test",
-    mode="overwrite",
-    properties=db_properties,
-)
-non_text_data_train.write.jdbc(
-    url=db_url,
-    table="non_text_data_train",
-    mode="overwrite",
-    properties=db_properties,
-)
-non_text_data_test.write.jdbc(
-    url=db_url,
-    table="non_text_data_test",
-    mode="overwrite",
-    properties=db_properties,
-)
-holdout_data.write.jdbc(
-    url=db_url,
-    table="holdout_data",
-    mode="overwrite",
-    properties=db_properties,
+
+def read_written_jdbc(table_name, id_column):
+    """
+    Ids saved to an RDS table, None if the table doesn't exist yet.
+    """
+    tables = spark.read.jdbc(
+        url=db_url,
+        table=f"""(
+            SELECT table_name FROM information_schema.tables
+            WHERE table_name = '{table_name}'
+        ) AS tables""",
+        properties=db_properties,
+    )
+    if tables.count() == 0:
+        return None
+    return spark.read.jdbc(
+        url=db_url,
+        table=f"(SELECT {id_column} FROM {table_name}) AS written",
+        properties=db_properties,
+    )
+
+
+# The id maps are also saved to RDS for lookups in SQL.
+if output_mode in ("jdbc", "both"):
+    for table_name, df in {**split_tables, **id_map_tables}.items():
+        id_column = table_ids[table_name]
+        if write_mode == "append":
+            written = read_written_jdbc(table_name, id_column)
+            df = unwritten_rows(df, written, id_column)
+        df.write.jdbc(
+            url=db_url,
+            table=table_name,
+            mode=write_mode,
+            properties=db_properties,
+        )
+
+save_review_watermark(
+    review_watermark, watermark_review_ids, sum(split_counts.values())
 )
 
+persisted_data.unpersist()
+
 print("ETL Complete")
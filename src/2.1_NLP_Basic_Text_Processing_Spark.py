@@ -1,5 +1,8 @@
 # NLP - Basic Text Features | Sentiment | Reading Level
 
+import time
+
+import pandas as pd
 import pyspark as ps
 from pyspark.sql import functions as F
 from pyspark.sql.types import *
@@ -7,6 +10,8 @@ from pyspark.sql.types import *
 import textstat
 from textblob import TextBlob
 
+from columnar_store import read_spark_table
+
 # Setting Up Spark
 
 spark = (
@@ -15,6 +20,7 @@ spark = (
         "spark.driver.extraClassPath", "/home/ubuntu/postgresql-42.2.20.jar"
     )
     .config("spark.driver.memory", "16G")
+    .config("spark.sql.execution.arrow.maxRecordsPerBatch", "5000")
     .master("local[7]")
     .getOrCreate()
 )
@@ -33,12 +39,19 @@ db_url = f"jdbc:postgresql://{db_endpoint}/yelp_2021_db"
 
 # Loading Data
 
-train = spark.read.jdbc(
-    url=db_url, table="text_data_train", properties=db_properties
-)
-test = spark.read.jdbc(
-    url=db_url, table="text_data_test", properties=db_properties
-)
+# Options: "jdbc" - AWS RDS, "parquet" - local columnar store from the ETL.
+data_source = "jdbc"
+
+if data_source == "parquet":
+    train = read_spark_table(spark, "text_data_train")
+    test = read_spark_table(spark, "text_data_test")
+else:
+    train = spark.read.jdbc(
+        url=db_url, table="text_data_train", properties=db_properties
+    )
+    test = spark.read.jdbc(
+        url=db_url, table="text_data_test", properties=db_properties
+    )
 
 train.createOrReplaceTempView("train")
 test.createOrReplaceTempView("test")
@@ -49,144 +62,329 @@ print(f"Test Records: {test.count()}")
 # Basic Text Characteristics
 
 
+def basic_text_features(df):
+    """
+    Adds word, character, digit, uppercase and #/@ counts
+    using built in Spark expressions in a single projection.
+    Runs entirely in the JVM, no rows are sent to Python.
+
+    Args:
+        df (Spark Dataframe): Must contain review_text.
+
+    Returns:
+        Spark Dataframe: df plus the basic text feature columns.
+    """
+    text = F.col("review_text")
+    # Equivalent of Python's str.split() with no arguments.
+    words = F.filter(F.split(text, r"(?U)\s+"), lambda w: w != "")
+    return df.select(
+        "*",
+        F.size(F.split(text, " ")).alias("word_count"),
+        F.length(text).alias("character_count"),
+        (
+            F.aggregate(words, F.lit(0), lambda acc, w: acc + F.length(w))
+            / F.size(words)
+        )
+        .cast(FloatType())
+        .alias("avg_word_length"),
+        F.size(F.filter(words, lambda w: w.rlike(r"(?U)^\d+$"))).alias(
+            "num_count"
+        ),
+        F.size(
+            F.filter(words, lambda w: (F.upper(w) == w) & (F.lower(w) != w))
+        ).alias("uppercase_count"),
+        F.size(F.filter(words, lambda w: w.rlike("^[#@]"))).alias("#_@_count"),
+    )
+
+
+# Original row at a time Python UDF versions of basic_text_features.
+# Kept as the reference implementation for check_basic_text_features.
+
+
 def avg_word(sentence):
     words = sentence.split()
     return sum(len(word) for word in words) / len(words)
 
 
-train = (
-    train.withColumn(
-        "word_count",
-        F.udf(lambda x: len(str(x).split(" ")), IntegerType())("review_text"),
+def basic_text_features_udf(df):
+    return (
+        df.withColumn(
+            "word_count",
+            F.udf(lambda x: len(str(x).split(" ")), IntegerType())(
+                "review_text"
+            ),
+        )
+        .withColumn(
+            "character_count",
+            F.udf(lambda x: len(x), IntegerType())("review_text"),
+        )
+        .withColumn(
+            "avg_word_length", F.udf(avg_word, FloatType())("review_text")
+        )
+        .withColumn(
+            "num_count",
+            F.udf(
+                lambda x: len([x for x in x.split() if x.isdigit()]),
+                IntegerType(),
+            )("review_text"),
+        )
+        .withColumn(
+            "uppercase_count",
+            F.udf(
+                lambda x: len([x for x in x.split() if x.isupper()]),
+                IntegerType(),
+            )("review_text"),
+        )
+        .withColumn(
+            "#_@_count",
+            F.udf(
+                lambda x: len(
+                    [
+                        x
+                        for x in x.split()
+                        if x.startswith("#") or x.startswith("@")
+                    ]
+                ),
+                IntegerType(),
+            )("review_text"),
+        )
     )
-    .withColumn(
+
+
+def check_basic_text_features(df, sample_size=10000):
+    """
+    Compares basic_text_features against the Python UDF reference
+    on a sample of reviews and prints mismatches per feature.
+
+    Args:
+        df (Spark Dataframe): Must contain review_id and review_text.
+        sample_size (int, optional): Number of reviews to compare.
+
+    Returns:
+        dict: Mismatched record count per feature.
+    """
+    feature_names = [
+        "word_count",
         "character_count",
-        F.udf(lambda x: len(x), IntegerType())("review_text"),
-    )
-    .withColumn("avg_word_length", F.udf(avg_word, FloatType())("review_text"))
-    .withColumn(
+        "avg_word_length",
         "num_count",
-        F.udf(
-            lambda x: len([x for x in x.split() if x.isdigit()]), IntegerType()
-        )("review_text"),
-    )
-    .withColumn(
         "uppercase_count",
-        F.udf(
-            lambda x: len([x for x in x.split() if x.isupper()]), IntegerType()
-        )("review_text"),
-    )
-    .withColumn(
         "#_@_count",
-        F.udf(
-            lambda x: len(
-                [
-                    x
-                    for x in x.split()
-                    if x.startswith("#") or x.startswith("@")
-                ]
-            ),
-            IntegerType(),
-        )("review_text"),
-    )
-    .withColumn(
-        "sentence_count",
-        F.udf(textstat.sentence_count, IntegerType())("review_text"),
-    )
-    .withColumn(
-        "lexicon_count",
-        F.udf(textstat.lexicon_count, IntegerType())("review_text"),
-    )
-    .withColumn(
-        "syllable_count",
-        F.udf(textstat.syllable_count, IntegerType())("review_text"),
+    ]
+    # Cached so both implementations see the same sampled rows.
+    sample = df.select("review_id", "review_text").limit(sample_size).cache()
+    native = basic_text_features(sample).select(
+        "review_id",
+        *[F.col(f"`{f}`").alias(f"native_{f}") for f in feature_names],
     )
+    reference = basic_text_features_udf(sample)
+    compared = reference.join(native, on="review_id")
+    mismatches = compared.select(
+        *[
+            F.sum(
+                F.when(
+                    F.abs(F.col(f"`{f}`") - F.col(f"native_{f}")) > 1e-4, 1
+                ).otherwise(0)
+            ).alias(f)
+            for f in feature_names
+        ]
+    ).collect()[0]
+    results = {f: mismatches[f] for f in feature_names}
+    print(f"Basic Text Feature Mismatches: {results}")
+    return results
+
+
+check_feature_parity = False
+if check_feature_parity:
+    check_basic_text_features(train)
+
+train = basic_text_features(train)
+test = basic_text_features(test)
+
+# Reading Level and Sentiment Analysis
+
+text_stats_schema = StructType(
+    [
+        StructField("sentence_count", IntegerType()),
+        StructField("lexicon_count", IntegerType()),
+        StructField("syllable_count", IntegerType()),
+        StructField("grade_level", FloatType()),
+        StructField("polarity", FloatType()),
+        StructField("subjectivity", FloatType()),
+    ]
 )
 
-test = (
-    test.withColumn(
-        "word_count",
-        F.udf(lambda x: len(str(x).split(" ")), IntegerType())("review_text"),
-    )
-    .withColumn(
-        "character_count",
-        F.udf(lambda x: len(x), IntegerType())("review_text"),
+
+def text_stats(text):
+    """
+    Readability counts, grade level and sentiment of one review.
+    textstat caches its counts, so the grade level reuses them,
+    and TextBlob parses the review once for both sentiment values.
+
+    Args:
+        text (str): Review text.
+
+    Returns:
+        tuple: Values in text_stats_schema order.
+    """
+    sentence_count = textstat.sentence_count(text)
+    lexicon_count = textstat.lexicon_count(text)
+    syllable_count = textstat.syllable_count(text)
+    grade_level = textstat.flesch_kincaid_grade(text)
+    sentiment = TextBlob(text).sentiment
+    return (
+        sentence_count,
+        lexicon_count,
+        syllable_count,
+        grade_level,
+        sentiment.polarity,
+        sentiment.subjectivity,
     )
-    .withColumn("avg_word_length", F.udf(avg_word, FloatType())("review_text"))
-    .withColumn(
-        "num_count",
-        F.udf(
-            lambda x: len([x for x in x.split() if x.isdigit()]), IntegerType()
-        )("review_text"),
+
+
+@F.pandas_udf(text_stats_schema)
+def text_stats_udf(texts: pd.Series) -> pd.DataFrame:
+    return pd.DataFrame(
+        [text_stats(text) for text in texts],
+        columns=text_stats_schema.fieldNames(),
     )
-    .withColumn(
-        "uppercase_count",
-        F.udf(
-            lambda x: len([x for x in x.split() if x.isupper()]), IntegerType()
-        )("review_text"),
+
+
+def text_stats_features(df):
+    """
+    Adds sentence, lexicon and syllable counts, grade level,
+    polarity and subjectivity with one Arrow batched UDF call.
+
+    Args:
+        df (Spark Dataframe): Must contain review_text.
+
+    Returns:
+        Spark Dataframe: df plus the text stats columns.
+    """
+    return (
+        df.withColumn("text_stats", text_stats_udf("review_text"))
+        .select("*", "text_stats.*")
+        .drop("text_stats")
     )
-    .withColumn(
-        "#_@_count",
-        F.udf(
-            lambda x: len(
-                [
-                    x
-                    for x in x.split()
-                    if x.startswith("#") or x.startswith("@")
-                ]
+
+
+# Original one UDF per column versions of text_stats_features.
+# Kept as the reference implementation for benchmark_text_stats.
+
+
+def text_stats_features_udf(df):
+    return (
+        df.withColumn(
+            "sentence_count",
+            F.udf(textstat.sentence_count, IntegerType())("review_text"),
+        )
+        .withColumn(
+            "lexicon_count",
+            F.udf(textstat.lexicon_count, IntegerType())("review_text"),
+        )
+        .withColumn(
+            "syllable_count",
+            F.udf(textstat.syllable_count, IntegerType())("review_text"),
+        )
+        .withColumn(
+            "grade_level",
+            F.udf(textstat.flesch_kincaid_grade, FloatType())("review_text"),
+        )
+        .withColumn(
+            "polarity",
+            F.udf(lambda x: TextBlob(x).sentiment.polarity, FloatType())(
+                "review_text"
             ),
-            IntegerType(),
-        )("review_text"),
-    )
-    .withColumn(
-        "sentence_count",
-        F.udf(textstat.sentence_count, IntegerType())("review_text"),
+        )
+        .withColumn(
+            "subjectivity",
+            F.udf(lambda x: TextBlob(x).sentiment.subjectivity, FloatType())(
+                "review_text"
+            ),
+        )
     )
-    .withColumn(
-        "lexicon_count",
-        F.udf(textstat.lexicon_count, IntegerType())("review_text"),
+
+
+def benchmark_text_stats(df, sample_size=10000):
+    """
+    Times text_stats_features against the per column UDF reference
+    on the same sample and prints mismatched records per feature.
+
+    Args:
+        df (Spark Dataframe): Must contain review_id and review_text.
+        sample_size (int, optional): Number of reviews to use.
+
+    Returns:
+        dict: Seconds taken by each implementation.
+    """
+    # Cached so both implementations see the same sampled rows.
+    sample = df.select("review_id", "review_text").limit(sample_size).cache()
+    sample.count()
+    timings = {}
+    for name, features in [
+        ("per_column_udf", text_stats_features_udf),
+        ("pandas_udf", text_stats_features),
+    ]:
+        start = time.perf_counter()
+        features(sample).write.format("noop").mode("overwrite").save()
+        timings[name] = time.perf_counter() - start
+        print(f"{name}: {timings[name]:.2f} seconds")
+    check_text_stats(sample)
+    sample.unpersist()
+    return timings
+
+
+def check_text_stats(df, sample_size=10000):
+    """
+    Compares text_stats_features with the per column textstat and
+    TextBlob UDFs on a sample and prints mismatched records per feature.
+    grade_level is compared with textstat.flesch_kincaid_grade, which
+    the original pipeline used.
+
+    Args:
+        df (Spark Dataframe): Must contain review_id and review_text.
+        sample_size (int, optional): Number of reviews to compare.
+
+    Returns:
+        dict: Mismatched records per feature.
+    """
+    # Cached so both implementations see the same sampled rows.
+    sample = df.select("review_id", "review_text").limit(sample_size).cache()
+    feature_names = text_stats_schema.fieldNames()
+    reference = text_stats_features_udf(sample)
+    batched = text_stats_features(sample).select(
+        "review_id", *[F.col(f).alias(f"batched_{f}") for f in feature_names]
     )
-    .withColumn(
-        "syllable_count",
-        F.udf(textstat.syllable_count, IntegerType())("review_text"),
+    mismatches = (
+        reference.join(batched, on="review_id")
+        .select(
+            *[
+                F.sum(
+                    F.when(
+                        F.abs(F.col(f) - F.col(f"batched_{f}")) > 1e-4, 1
+                    ).otherwise(0)
+                ).alias(f)
+                for f in feature_names
+            ]
+        )
+        .collect()[0]
     )
-)
+    results = {f: mismatches[f] for f in feature_names}
+    print(f"Text Stats Mismatches: {results}")
+    sample.unpersist()
+    return results
 
-# Reading Level
 
-train = train.withColumn(
-    "grade_level",
-    F.udf(textstat.flesch_kincaid_grade, FloatType())("review_text"),
-)
-test = test.withColumn(
-    "grade_level",
-    F.udf(textstat.flesch_kincaid_grade, FloatType())("review_text"),
-)
+run_text_stats_benchmark = False
+if run_text_stats_benchmark:
+    benchmark_text_stats(train)
 
-# Sentiment Analysis
-
-train = train.withColumn(
-    "polarity",
-    F.udf(lambda x: TextBlob(x).sentiment.polarity, FloatType())(
-        "review_text"
-    ),
-).withColumn(
-    "subjectivity",
-    F.udf(lambda x: TextBlob(x).sentiment.subjectivity, FloatType())(
-        "review_text"
-    ),
-)
-test = test.withColumn(
-    "polarity",
-    F.udf(lambda x: TextBlob(x).sentiment.polarity, FloatType())(
-        "review_text"
-    ),
-).withColumn(
-    "subjectivity",
-    F.udf(lambda x: TextBlob(x).sentiment.subjectivity, FloatType())(
-        "review_text"
-    ),
-)
+check_text_stats_parity = False
+if check_text_stats_parity:
+    check_text_stats(train)
+
+train = text_stats_features(train)
+test = text_stats_features(test)
 
 # Save Data To AWS RDS
 
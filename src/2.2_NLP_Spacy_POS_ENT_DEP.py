@@ -4,20 +4,30 @@
 #                          syntactic relationships - Spacy)
 # Imports and Global Settings
 # Common Libraries
+import os
 import re
+import json
 import time
+import queue
+import threading
+import multiprocessing
+import psutil
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 # Main NLP library
 import spacy
+from spacy.attrs import DEP, ENT_IOB, ENT_TYPE, IS_STOP, POS
 
 # Connecting to Postgres RDS on AWS
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.dialects import postgresql
 
 from confidential import Yelp_2021_DB_endpoint, Yelp_2021_DB_password
+from bulk_writer import write_frame
+from columnar_store import iter_pandas_table
+from sql_chunks import keyset_chunks
 
 pd.set_option("display.float_format", lambda x: "%.5f" % x)
 
@@ -29,9 +39,57 @@ db_password = Yelp_2021_DB_password
 engine = create_engine(
     f"postgresql+psycopg2://postgres:{db_password}@{db_endpoint}/yelp_2021_db"
 )
-conn = engine.connect().execution_options(stream_results=True)
 chunksize = 100000
 
+# Spacy Processing Options
+# stream_docs: Featurize each Doc as nlp.pipe yields it and discard it,
+#              instead of holding every Doc of the chunk in a list.
+# spacy_batch_size: Texts per nlp.pipe batch.
+# spacy_n_process: nlp.pipe worker processes. -1 uses every core.
+# memory_limit_mb: Memory ceiling in megabytes, measured as the combined
+#                  current RSS of this process and its child processes.
+#                  Processing stops with a MemoryError once exceeded.
+#                  With use_pipeline it is checked after every chunk.
+#                  Otherwise it is checked after every spacy_batch_size
+#                  texts, and spacy_n_process > 1 parses on a process
+#                  pool that is terminated once the limit is passed.
+#                  Both cover the worker processes. None disables it.
+stream_docs = True
+spacy_batch_size = 1000
+spacy_n_process = -1
+memory_limit_mb = None
+
+# Options: "jdbc" - AWS RDS, "parquet" - local columnar store from the ETL.
+data_source = "jdbc"
+
+
+def load_text_chunks(table_name, after_review_id=None):
+    """
+    Streams review_id and review_text from the chosen data source.
+
+    Args:
+        table_name (str): Source table name.
+        after_review_id (optional): Resume point for the jdbc source.
+            Parquet chunks are always read from the start.
+
+    Returns:
+        Iterator of Dataframes: Chunks of chunksize records.
+    """
+    if data_source == "parquet":
+        return iter_pandas_table(
+            table_name,
+            columns=["review_id", "review_text"],
+            chunksize=chunksize,
+        )
+    return keyset_chunks(
+        engine,
+        table_name,
+        columns=["review_id", "review_text"],
+        chunksize=chunksize,
+        after=after_review_id,
+    )
+
+
 # Linguistic Components with Spacy
 
 pos_list = [
@@ -121,7 +179,149 @@ ent_list = [
     "WORK_OF_ART",
 ]
 
-nlp = spacy.load("en_core_web_sm")
+# Feature Profiles
+# Each profile only runs the pipeline components its features need.
+# Coarse POS tags come from the tagger plus the attribute_ruler mapping,
+# dependency labels from the parser and entities from ner.
+# The lemmatizer is never used by any feature.
+# Stopword and token counts are lexical and always included.
+spacy_profiles = {
+    "pos": {
+        "disable": ["parser", "ner", "lemmatizer"],
+        "feature_groups": ["pos"],
+    },
+    "pos_ner": {
+        "disable": ["parser", "lemmatizer"],
+        "feature_groups": ["pos", "ent"],
+    },
+    "full": {
+        "disable": ["lemmatizer"],
+        "feature_groups": ["pos", "dep", "ent"],
+    },
+}
+spacy_profile = "full"
+
+nlp = spacy.load(
+    "en_core_web_sm", disable=spacy_profiles[spacy_profile]["disable"]
+)
+
+# Token attributes pulled from each Doc in a single to_array call.
+token_attrs = [POS, DEP, ENT_TYPE, ENT_IOB, IS_STOP]
+ent_iob_begin = 3  # ENT_IOB value of the first token of an entity
+
+
+def label_lookup(labels):
+    """
+    Builds a sorted id lookup for a fixed list of spacy labels.
+
+    Args:
+        labels (list of str): Label names, e.g. pos_list.
+
+    Returns:
+        tuple: Sorted label ids and each sorted id's position in labels.
+    """
+    ids = np.array([nlp.vocab.strings[label] for label in labels], "uint64")
+    order = np.argsort(ids)
+    return ids[order], order
+
+
+pos_lookup = label_lookup(pos_list)
+dep_lookup = label_lookup(dep_list)
+ent_lookup = label_lookup(ent_list)
+
+count_feature_names = (
+    ["stopword", "ent"]
+    + [f"pos_{pos.lower()}" for pos in pos_list]
+    + [f"dep_{dep.lower()}" for dep in dep_list]
+    + [f"ent_{ent.lower()}" for ent in ent_list]
+)
+
+
+def feature_group(count_feature_name):
+    """
+    Args:
+        count_feature_name (str): Entry of count_feature_names.
+
+    Returns:
+        str: Feature group the count belongs to.
+             One of "stopword", "pos", "dep", "ent".
+    """
+    if count_feature_name == "stopword":
+        return "stopword"
+    return count_feature_name.split("_")[0]
+
+
+profile_feature_groups = ["stopword"] + spacy_profiles[spacy_profile][
+    "feature_groups"
+]
+
+
+def count_labels(values, lookup):
+    """
+    Counts how often each label of a lookup appears in values.
+    Values not in the lookup are ignored.
+
+    Args:
+        values (array of uint64): Label ids from Doc.to_array.
+        lookup (tuple): Output of label_lookup.
+
+    Returns:
+        array of int: Count per label, in the original label order.
+    """
+    sorted_ids, order = lookup
+    positions = np.searchsorted(sorted_ids, values)
+    positions = np.minimum(positions, len(sorted_ids) - 1)
+    found = sorted_ids[positions] == values
+    return np.bincount(order[positions[found]], minlength=len(sorted_ids))
+
+
+def doc_feature_counts(doc):
+    """
+    Counts stopwords, entities and every pos, dep and ent label
+    of a Doc in one pass over its token attribute array.
+
+    Args:
+        doc (spacy Doc)
+
+    Returns:
+        array of int: Counts in count_feature_names order.
+    """
+    tokens = doc.to_array(token_attrs)
+    ent_starts = tokens[:, 3] == ent_iob_begin
+    return np.concatenate(
+        [
+            [tokens[:, 4].sum(), ent_starts.sum()],
+            count_labels(tokens[:, 0], pos_lookup),
+            count_labels(tokens[:, 1], dep_lookup),
+            count_labels(tokens[ent_starts, 2], ent_lookup),
+        ]
+    )
+
+
+def spacy_feature_frame(token_counts, feature_counts, index):
+    """
+    Builds the count and percentage feature columns for a chunk.
+
+    Args:
+        token_counts (array of int): Tokens per review.
+        feature_counts (2d array of int): doc_feature_counts per review.
+        index (Index): Index of the chunk the features belong to.
+
+    Returns:
+        Dataframe: token_count followed by a _perc and _count column
+                   for each entry of count_feature_names
+                   that belongs to the active spacy_profile.
+    """
+    percents = np.round(
+        feature_counts / np.maximum(token_counts, 1)[:, np.newaxis], 5
+    )
+    columns = {"token_count": token_counts}
+    for idx, name in enumerate(count_feature_names):
+        if feature_group(name) not in profile_feature_groups:
+            continue
+        columns[f"{name}_perc"] = percents[:, idx]
+        columns[f"{name}_count"] = feature_counts[:, idx]
+    return pd.DataFrame(columns, index=index)
 
 
 def create_spacy_docs(text_series):
@@ -129,9 +329,125 @@ def create_spacy_docs(text_series):
     return spacy_docs
 
 
+def process_tree_memory_mb():
+    """
+    Current resident memory of this process and all of its children,
+    e.g. the pipeline pool workers. Pages shared with forked children are
+    counted once per process, so the total errs on the high side.
+
+    Returns:
+        float: Combined resident memory in megabytes.
+    """
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss / 1024**2
+
+
+def stream_spacy_features(
+    text_series,
+    batch_size=spacy_batch_size,
+    n_process=spacy_n_process,
+    memory_limit=memory_limit_mb,
+):
+    """
+    Featurizes texts straight from nlp.pipe into preallocated arrays.
+    Each Doc is discarded as soon as its counts are stored,
+    so memory use does not grow with the number of parsed Docs.
+
+    Args:
+        text_series (Series): Texts to featurize.
+        batch_size (int, optional): Texts per nlp.pipe batch.
+        n_process (int, optional): nlp.pipe worker processes.
+        memory_limit (float, optional): Memory ceiling in megabytes.
+
+    Raises:
+        MemoryError: If memory use passes memory_limit.
+
+    Returns:
+        tuple of arrays: Token counts and doc_feature_counts per text.
+    """
+    if memory_limit is not None and n_process != 1:
+        return pooled_spacy_features(
+            text_series, batch_size, n_process, memory_limit
+        )
+    record_count = len(text_series)
+    token_counts = np.zeros(record_count, dtype="int64")
+    feature_counts = np.zeros(
+        (record_count, len(count_feature_names)), dtype="int64"
+    )
+    docs = nlp.pipe(
+        texts=text_series, batch_size=batch_size, n_process=n_process
+    )
+    for idx, doc in enumerate(docs):
+        token_counts[idx] = len(doc)
+        feature_counts[idx] = doc_feature_counts(doc)
+        if memory_limit is not None and idx % batch_size == 0:
+            memory_mb = process_tree_memory_mb()
+            if memory_mb > memory_limit:
+                raise MemoryError(
+                    f"Memory use {memory_mb:.0f} MB passed the "
+                    f"{memory_limit} MB limit after {idx} records. "
+                    "Lower chunksize or spacy_batch_size."
+                )
+    return token_counts, feature_counts
+
+
+def pooled_spacy_features(text_series, batch_size, n_process, memory_limit):
+    """
+    Multi process stream_spacy_features under a memory ceiling.
+    A multi process nlp.pipe can't be stopped early without its forked
+    workers hanging, so batches of texts are parsed by a process pool
+    instead, which is terminated as soon as the ceiling is passed.
+    Memory is measured after every batch, workers included.
+
+    Args:
+        text_series (Series): Texts to featurize.
+        batch_size (int): Texts per pool task.
+        n_process (int): Pool worker processes. -1 uses every core.
+        memory_limit (float): Memory ceiling in megabytes.
+
+    Raises:
+        MemoryError: If memory use passes memory_limit.
+
+    Returns:
+        tuple of arrays: Token counts and doc_feature_counts per text.
+    """
+    texts = text_series.tolist()
+    record_count = len(texts)
+    token_counts = np.zeros(record_count, dtype="int64")
+    feature_counts = np.zeros(
+        (record_count, len(count_feature_names)), dtype="int64"
+    )
+    starts = range(0, record_count, batch_size)
+    batches = [texts[start : start + batch_size] for start in starts]
+    workers = os.cpu_count() if n_process == -1 else n_process
+    # Leaving the block terminates the workers, also on a MemoryError.
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        results = pool.imap(featurize_texts, batches)
+        for start, (tokens, features) in zip(starts, results):
+            stop = start + len(tokens)
+            token_counts[start:stop] = tokens
+            feature_counts[start:stop] = features
+            memory_mb = process_tree_memory_mb()
+            if memory_mb > memory_limit:
+                raise MemoryError(
+                    f"Memory use {memory_mb:.0f} MB passed the "
+                    f"{memory_limit} MB limit after {stop} records. "
+                    "Lower chunksize or spacy_batch_size."
+                )
+    return token_counts, feature_counts
+
+
 def create_spacy_features(df, text_feature_name):
     """
         Adds various features using Spacy's library and NLP models.
+        All labels of a review are counted in a single pass
+        over its Doc.to_array token attributes.
     ​
         Key Terms:
             pos_dict: Part of Speech
@@ -143,94 +459,321 @@ def create_spacy_features(df, text_feature_name):
             ent_list: Named Entity
                       https://spacy.io/api/annotation#named-entities
     """
+    if stream_docs:
+        token_counts, feature_counts = stream_spacy_features(
+            df[text_feature_name]
+        )
+    else:
+        docs = create_spacy_docs(df[text_feature_name])
+        token_counts = np.array([len(doc) for doc in docs], dtype="int64")
+        feature_counts = np.array(
+            [doc_feature_counts(doc) for doc in docs], dtype="int64"
+        ).reshape(len(docs), len(count_feature_names))
+        del docs
+    df = df.drop(text_feature_name, axis=1)
+
+    features = spacy_feature_frame(token_counts, feature_counts, df.index)
+    return pd.concat([df, features], axis=1)
+
+
+def benchmark_spacy_profiles(text_series, batch_size=spacy_batch_size):
+    """
+    Prints parsing speed of each feature profile on the same texts.
 
-    df["spacy_doc"] = create_spacy_docs(df[text_feature_name])
-    df.drop("review_text", axis=1, inplace=True)
+    Args:
+        text_series (Series): Texts to parse.
+        batch_size (int, optional): Texts per nlp.pipe batch.
 
-    df["token_count"] = df["spacy_doc"].apply(lambda x: len(x))
-    df["stopword_perc"] = df["spacy_doc"].apply(
-        lambda x: round(
-            len([token for token in x if token.is_stop]) / len(x), 5
+    Returns:
+        dict: Docs per second for each profile.
+    """
+    results = {}
+    for profile, settings in spacy_profiles.items():
+        profile_nlp = spacy.load("en_core_web_sm", disable=settings["disable"])
+        start = time.perf_counter()
+        for doc in profile_nlp.pipe(texts=text_series, batch_size=batch_size):
+            pass
+        stop = time.perf_counter()
+        results[profile] = len(text_series) / (stop - start)
+        print(
+            f"Profile: {profile} - Components: {profile_nlp.pipe_names} - "
+            f"{results[profile]:.0f} docs/sec"
         )
+    return results
+
+
+run_profile_benchmark = False
+if run_profile_benchmark:
+    benchmark_spacy_profiles(
+        next(iter(load_text_chunks("text_data_train")))["review_text"]
     )
-    df["stopword_count"] = df["spacy_doc"].apply(
-        lambda x: len([token for token in x if token.is_stop])
-    )
-    df["ent_perc"] = df["spacy_doc"].apply(
-        lambda x: round(len(x.ents) / len(x), 5)
-    )
-    df["ent_count"] = df["spacy_doc"].apply(lambda x: len(x.ents))
 
-    for pos in pos_list:
-        df[f"pos_{pos.lower()}_perc"] = df["spacy_doc"].apply(
-            lambda x: round(
-                len([token for token in x if token.pos_ == pos]) / len(x), 5
-            )
-        )
-        df[f"pos_{pos.lower()}_count"] = df["spacy_doc"].apply(
-            lambda x: len([token for token in x if token.pos_ == pos])
-        )
-    for dep in dep_list:
-        df[f"dep_{dep.lower()}_perc"] = df["spacy_doc"].apply(
-            lambda x: round(
-                len([token for token in x if token.dep_ == dep]) / len(x), 5
+# Resumable Chunk Driver
+
+manifest_location = "./"
+
+
+def manifest_path(out_table):
+    return os.path.join(manifest_location, f"{out_table}_manifest.json")
+
+
+def load_manifest(out_table):
+    """
+    Loads the completed chunk ranges of a spacy job.
+
+    Args:
+        out_table (str): Output table of the job.
+
+    Returns:
+        dict: {"completed": [[first_review_id, last_review_id, records]]}
+    """
+    path = manifest_path(out_table)
+    if not os.path.exists(path):
+        return {"completed": []}
+    with open(path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_manifest(out_table, manifest):
+    """
+    Atomically replaces the manifest so a crash mid write
+    never leaves a truncated file behind.
+    """
+    path = manifest_path(out_table)
+    with open(f"{path}.tmp", "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(f"{path}.tmp", path)
+
+
+def save_chunk(df, out_table, replace_existing=False):
+    """
+    Saves a chunk of features. The table is indexed on review_id
+    when it is created.
+
+    Args:
+        df (Dataframe): Chunk of features.
+        out_table (str): Output table name.
+        replace_existing (bool, optional): Delete rows already saved
+            for the chunk's review_ids in the same transaction as the
+            insert. Only the first chunk of a resumed job can have
+            them, saved by a run that crashed before updating the
+            manifest. Defaults to False.
+    """
+    with engine.begin() as connection:
+        exists = inspect(connection).has_table(out_table)
+        if exists and replace_existing:
+            connection.execute(
+                text(f"DELETE FROM {out_table} WHERE review_id = ANY(:ids)"),
+                {"ids": df["review_id"].tolist()},
             )
-        )
-        df[f"dep_{dep.lower()}_count"] = df["spacy_doc"].apply(
-            lambda x: len([token for token in x if token.dep_ == dep])
-        )
-    for ent in ent_list:
-        df[f"ent_{ent.lower()}_perc"] = df["spacy_doc"].apply(
-            lambda x: round(
-                len([y for y in x.ents if y.label_ == ent]) / len(x), 5
+        write_frame(df, out_table, connection)
+        if not exists:
+            connection.execute(
+                text(
+                    f"CREATE INDEX {out_table}_review_id_idx "
+                    f"ON {out_table} (review_id)"
+                )
             )
+
+
+def pending_chunks(in_table, out_table, manifest):
+    """
+    Yields the chunks of in_table not yet recorded in the manifest.
+
+    Args:
+        in_table (str): Table with review_id and review_text.
+        out_table (str): Output table of the job.
+        manifest (dict): Output of load_manifest.
+
+    Yields:
+        Dataframe: Next unfinished chunk.
+    """
+    completed = {(first, last) for first, last, _ in manifest["completed"]}
+    resume_after = max((last for _, last in completed), default=None)
+    if completed:
+        print(f"Resuming {out_table} after review_id {resume_after}")
+    for chunk in load_text_chunks(in_table, resume_after):
+        first_id = chunk["review_id"].min()
+        last_id = chunk["review_id"].max()
+        if (first_id, last_id) not in completed:
+            yield chunk
+
+
+def record_chunk(out_table, manifest, features, first_of_run=False):
+    """
+    Saves a chunk of features and records it as completed.
+
+    Args:
+        out_table (str): Output table name.
+        manifest (dict): Output of load_manifest. Updated in place.
+        features (Dataframe): Chunk of features.
+        first_of_run (bool, optional): First chunk saved by this run,
+            see save_chunk's replace_existing. Defaults to False.
+
+    Returns:
+        int: Total records processed by the job so far.
+    """
+    save_chunk(features, out_table, replace_existing=first_of_run)
+    # tolist gives python scalars, json can't encode numpy ints.
+    first_id, last_id = features["review_id"].agg(["min", "max"]).tolist()
+    manifest["completed"].append([first_id, last_id, features.shape[0]])
+    save_manifest(out_table, manifest)
+    return sum(records for _, _, records in manifest["completed"])
+
+
+def run_spacy_job(in_table, out_table):
+    """
+    Featurizes every review of in_table into out_table chunk by chunk.
+    Completed chunk ranges are recorded in a manifest after each save,
+    so a restarted job skips straight past the finished chunks.
+
+    Args:
+        in_table (str): Table with review_id and review_text.
+        out_table (str): Table to save the spacy features to.
+    """
+    manifest = load_manifest(out_table)
+    pending = pending_chunks(in_table, out_table, manifest)
+    for chunk_number, chunk in enumerate(pending):
+        start = time.perf_counter()
+        features = create_spacy_features(chunk, "review_text")
+        records_processed = record_chunk(
+            out_table, manifest, features, first_of_run=chunk_number == 0
         )
-        df[f"ent_{ent.lower()}_count"] = df["spacy_doc"].apply(
-            lambda x: len([y for y in x.ents if y.label_ == ent])
-        )
+        stop = time.perf_counter()
+        print(f"Total records processed: {records_processed}")
+        print(f"Loop time: {((stop-start) / 60):.2f} minutes")
 
-    df.drop("spacy_doc", axis=1, inplace=True)
 
-    return df
+# Pipelined Executor
+# A reader thread, a persistent process pool and a writer thread
+# connected by bounded queues. While the pool parses chunk n,
+# chunk n+1 is being read and chunk n-1 is being saved.
+# Workers are forked once per job and inherit the loaded nlp model.
+# pipeline_workers: Parsing processes.
+# pipeline_queue_size: Chunks buffered between stages.
+# worker_batch_size: Texts sent to a worker per task.
+use_pipeline = True
+pipeline_workers = os.cpu_count()
+pipeline_queue_size = 2
+worker_batch_size = 2000
 
 
-# Run Spacy Function and Save to AWS RDS
+def featurize_texts(texts):
+    """
+    Pool task. Parses a batch of texts in a single worker process.
 
-records_processed = 0
-for chunk in pd.read_sql(
-    sql="SELECT review_id, review_text FROM text_data_train",
-    con=conn,
-    chunksize=chunksize,
-):
-    start = time.perf_counter()
-    text = create_spacy_features(chunk, "review_text")
-    records_processed += text.shape[0]
-    text.to_sql(
-        "text_data_train_spacy_test",
-        con=engine,
-        index=False,
-        if_exists="append",
-    )
-    stop = time.perf_counter()
-    print(f"Total records processed: {records_processed}")
-    print(f"Loop time: {((stop-start) / 60):.2f} minutes")
+    Args:
+        texts (list of str)
 
+    Returns:
+        tuple of arrays: Token counts and doc_feature_counts per text.
+    """
+    return stream_spacy_features(texts, n_process=1, memory_limit=None)
 
-records_processed = 0
-for chunk in pd.read_sql(
-    sql="SELECT review_id, review_text FROM text_data_test",
-    con=conn,
-    chunksize=chunksize,
-):
-    start = time.perf_counter()
-    text = create_spacy_features(chunk, "review_text")
-    records_processed += text.shape[0]
-    text.to_sql(
-        "text_data_test_spacy_test",
-        con=engine,
-        index=False,
-        if_exists="append",
-    )
-    stop = time.perf_counter()
-    print(f"Total records processed: {records_processed}")
-    print(f"Loop time: {((stop-start) / 60):.2f} minutes")
+
+def featurize_chunk(pool, chunk):
+    """
+    Spreads a chunk over the pool and reassembles the features
+    in the original record order.
+
+    Args:
+        pool (multiprocessing Pool)
+        chunk (Dataframe): Contains review_id and review_text.
+
+    Returns:
+        Dataframe: Same output as create_spacy_features.
+    """
+    texts = chunk["review_text"].tolist()
+    batches = [
+        texts[idx : idx + worker_batch_size]
+        for idx in range(0, len(texts), worker_batch_size)
+    ]
+    results = list(pool.imap(featurize_texts, batches))
+    token_counts = np.concatenate([counts for counts, _ in results])
+    feature_counts = np.concatenate([counts for _, counts in results])
+    df = chunk.drop("review_text", axis=1)
+    features = spacy_feature_frame(token_counts, feature_counts, df.index)
+    return pd.concat([df, features], axis=1)
+
+
+def run_spacy_job_pipelined(in_table, out_table):
+    """
+    Pipelined version of run_spacy_job with the same manifest,
+    resume behavior and output.
+
+    Args:
+        in_table (str): Table with review_id and review_text.
+        out_table (str): Table to save the spacy features to.
+    """
+    manifest = load_manifest(out_table)
+    read_queue = queue.Queue(maxsize=pipeline_queue_size)
+    write_queue = queue.Queue(maxsize=pipeline_queue_size)
+    errors = []
+
+    def reader():
+        try:
+            for chunk in pending_chunks(in_table, out_table, manifest):
+                read_queue.put(chunk)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            read_queue.put(None)
+
+    def writer():
+        first_of_run = True
+        try:
+            while True:
+                features = write_queue.get()
+                if features is None:
+                    return
+                start = time.perf_counter()
+                records_processed = record_chunk(
+                    out_table, manifest, features, first_of_run
+                )
+                first_of_run = False
+                stop = time.perf_counter()
+                print(f"Total records processed: {records_processed}")
+                print(f"Save time: {((stop-start) / 60):.2f} minutes")
+        except Exception as error:
+            errors.append(error)
+            # Keep draining so the parsing stage never blocks on a put.
+            while write_queue.get() is not None:
+                pass
+
+    # The pool is forked before any thread starts.
+    with multiprocessing.get_context("fork").Pool(pipeline_workers) as pool:
+        reader_thread = threading.Thread(target=reader, daemon=True)
+        writer_thread = threading.Thread(target=writer)
+        reader_thread.start()
+        writer_thread.start()
+        try:
+            while not errors:
+                chunk = read_queue.get()
+                if chunk is None:
+                    break
+                start = time.perf_counter()
+                write_queue.put(featurize_chunk(pool, chunk))
+                stop = time.perf_counter()
+                print(f"Parse time: {((stop-start) / 60):.2f} minutes")
+                # The pool workers are children, so they are included.
+                memory_mb = process_tree_memory_mb()
+                if memory_limit_mb is not None and memory_mb > memory_limit_mb:
+                    raise MemoryError(
+                        f"Memory use {memory_mb:.0f} MB passed the "
+                        f"{memory_limit_mb} MB limit. "
+                        "Lower chunksize or worker_batch_size."
+                    )
+        finally:
+            # Always stop the writer, or a parsing error leaves the
+            # process waiting on it forever.
+            write_queue.put(None)
+            writer_thread.join()
+    if errors:
+        raise errors[0]
+
+
+# Run Spacy Function and Save to AWS RDS
+
+spacy_job = run_spacy_job_pipelined if use_pipeline else run_spacy_job
+spacy_job("text_data_train", "text_data_train_spacy_test")
+spacy_job("text_data_test", "text_data_test_spacy_test")
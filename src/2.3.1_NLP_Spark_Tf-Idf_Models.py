@@ -31,6 +31,8 @@ from pyspark.ml.evaluation import (
 # Stopwords
 from nltk.corpus import stopwords
 
+from columnar_store import read_spark_table
+
 # Set Up Spark
 
 spark = (
@@ -56,16 +58,26 @@ db_properties = {
 db_endpoint = None
 db_url = f"jdbc:postgresql://{db_endpoint}/yelp_2021_db"
 
-train = spark.read.jdbc(
-    url=db_url,
-    table="(SELECT review_id, review_text, target_ufc_bool FROM text_data_train LIMIT 1000) AS tmp_train",
-    properties=db_properties,
-)
-test = spark.read.jdbc(
-    url=db_url,
-    table="(SELECT review_id, review_text, target_ufc_bool FROM text_data_test LIMIT 1000) AS tmp_test",
-    properties=db_properties,
-)
+# Options: "jdbc" - AWS RDS, "parquet" - local columnar store from the ETL.
+data_source = "jdbc"
+
+if data_source == "parquet":
+    text_columns = ["review_id", "review_text", "target_ufc_bool"]
+    train = read_spark_table(spark, "text_data_train", text_columns).limit(
+        1000
+    )
+    test = read_spark_table(spark, "text_data_test", text_columns).limit(1000)
+else:
+    train = spark.read.jdbc(
+        url=db_url,
+        table="(SELECT review_id, review_text, target_ufc_bool FROM text_data_train LIMIT 1000) AS tmp_train",
+        properties=db_properties,
+    )
+    test = spark.read.jdbc(
+        url=db_url,
+        table="(SELECT review_id, review_text, target_ufc_bool FROM text_data_test LIMIT 1000) AS tmp_test",
+        properties=db_properties,
+    )
 
 train.createOrReplaceTempView("train")
 test.createOrReplaceTempView("test")
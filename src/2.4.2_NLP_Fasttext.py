@@ -6,6 +6,9 @@ import pandas as pd
 from sqlalchemy import create_engine
 from gensim.utils import simple_preprocess
 
+from bulk_writer import write_frame
+from columnar_store import read_pandas_table
+
 # Load Data
 db_endpoint = None
 db_name = "yelp_2021_db"
@@ -22,8 +25,16 @@ test_query = (
     "SELECT review_id, review_text, target_ufc_bool FROM text_data_test"
 )
 
-train = pd.read_sql(sql=train_query, con=engine)
-test = pd.read_sql(sql=test_query, con=engine)
+# Options: "jdbc" - AWS RDS, "parquet" - local columnar store from the ETL.
+data_source = "jdbc"
+
+if data_source == "parquet":
+    text_columns = ["review_id", "review_text", "target_ufc_bool"]
+    train = read_pandas_table("text_data_train", columns=text_columns)
+    test = read_pandas_table("text_data_test", columns=text_columns)
+else:
+    train = pd.read_sql(sql=train_query, con=engine)
+    test = pd.read_sql(sql=test_query, con=engine)
 
 print("Data Loaded")
 
@@ -95,10 +106,8 @@ test = test.drop(columns=["review_text", "target_ufc_bool", "predictions"])
 print("Predictions Complete")
 
 # Save Fasttext Results and Model
-train.to_sql(
-    "text_fasttext_train", con=engine, index=False, if_exists="replace"
-)
-test.to_sql("text_fasttext_test", con=engine, index=False, if_exists="replace")
+write_frame(train, "text_fasttext_train", engine, if_exists="replace")
+write_frame(test, "text_fasttext_test", engine, if_exists="replace")
 
 print("Save to RDS Complete")
 
@@ -25,6 +25,9 @@ from nltk.corpus import stopwords
 # spacy
 import spacy
 
+from bulk_writer import write_frame
+from columnar_store import read_pandas_table
+
 pd.set_option('display.float_format', lambda x: '%.5f' % x)
 pd.set_option("display.max_columns", 200)
 pd.set_option("display.max_rows", 200)
@@ -36,8 +39,19 @@ engine = create_engine(
             f"postgresql+psycopg2://postgres:{db_password}@{db_endpoint}/yelp_2021_db"
             )
 
-train = pd.read_sql(sql=f"SELECT review_id, review_text FROM text_data_train", con=engine)
-test = pd.read_sql(sql=f"SELECT review_id, review_text FROM text_data_test", con=engine)
+# Options: "jdbc" - AWS RDS, "parquet" - local columnar store from the ETL.
+data_source = "jdbc"
+
+if data_source == "parquet":
+    train = read_pandas_table(
+        "text_data_train", columns=["review_id", "review_text"]
+    )
+    test = read_pandas_table(
+        "text_data_test", columns=["review_id", "review_text"]
+    )
+else:
+    train = pd.read_sql(sql=f"SELECT review_id, review_text FROM text_data_train", con=engine)
+    test = pd.read_sql(sql=f"SELECT review_id, review_text FROM text_data_test", con=engine)
 
 print("Data Loaded")
 
@@ -155,19 +169,9 @@ finished_test = finished_test.drop(columns=['review_text'])
 print("Test Data Complete")
 
 # Save Data
-finished_train.to_sql(
-        "text_lda_train",
-        con=engine,
-        index=False,
-        if_exists="replace",
-    )
+write_frame(finished_train, "text_lda_train", engine, if_exists="replace")
 
-finished_test.to_sql(
-        "text_lda_test",
-        con=engine,
-        index=False,
-        if_exists="replace",
-    )
+write_frame(finished_test, "text_lda_test", engine, if_exists="replace")
 
 print("Save to RDS Complete")
 print("Done")
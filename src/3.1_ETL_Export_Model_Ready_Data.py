@@ -0,0 +1,72 @@
+# Exports the combined text tables as model ready feather files
+
+# Imports
+import time
+import pandas as pd
+from sqlalchemy import create_engine
+
+from bulk_writer import quote
+from feature_catalog import (
+    datatypes,
+    load_columns,
+    write_model_ready_feather,
+)
+from sql_chunks import cursor_chunks
+
+db_endpoint = None
+db_name = "yelp_2021_db"
+db_password = None
+
+engine = create_engine(
+    f"postgresql+psycopg2://postgres:{db_password}@{db_endpoint}/{db_name}"
+)
+
+# Options
+# EC2
+filepath_prefix = "/home/ubuntu/"
+# Local
+# filepath_prefix = "/home/jeff/Documents/Data_Science_Projects/Yelp_Reviews/data/full_data/model_ready/"
+
+# Options: "postgres" - text_combined_{split} tables from
+#                       3_ETL_Combine_Processed_Text_Data.sql.
+#          "csv" - Convert an existing {split}.csv export.
+export_source = "postgres"
+chunksize = 500000
+
+
+def model_ready_chunks(split):
+    """
+    Streams a split of the model ready data from export_source.
+
+    Args:
+        split (str): "train" or "test".
+
+    Returns:
+        iterator of Dataframes: Chunks of load_columns().
+    """
+    columns = load_columns()
+    if export_source == "csv":
+        return pd.read_csv(
+            f"{filepath_prefix}{split}.csv",
+            usecols=columns,
+            chunksize=chunksize,
+            true_values=["True"],
+            false_values=["False"],
+            dtype=datatypes,
+        )
+    query = f"""
+        SELECT {", ".join(quote(column) for column in columns)}
+        FROM text_combined_{split}
+        """
+    return cursor_chunks(engine, query, chunksize=chunksize)
+
+
+for split in ["train", "test"]:
+    start = time.perf_counter()
+    rows = write_model_ready_feather(
+        model_ready_chunks(split), f"{filepath_prefix}{split}.feather"
+    )
+    end = time.perf_counter()
+    print(f"\n{split}.feather Export Complete")
+    print(f"Records: {rows}")
+    print(f"Took {(end-start):.2f} seconds")
@@ -0,0 +1,178 @@
+"""
+Bulk dataframe writer.
+
+Streams dataframes into Postgres with COPY FROM STDIN instead of the
+INSERT batches issued by DataFrame.to_sql, which are very slow for
+wide feature tables. Tables are created from pandas' own schema for
+the dataframe, so column types match what to_sql would have produced.
+Later chunks are serialized to fit the column types of the table,
+which were set by the first chunk.
+
+Any other database, e.g. the local SQLite engine from local_engine,
+falls back to to_sql so the stages can be run without Postgres.
+"""
+
+import io
+
+import pandas as pd
+from sqlalchemy import Integer, create_engine, inspect, text
+from sqlalchemy.engine import Engine
+
+# Marker for missing values in the COPY stream.
+# Unlike an empty field it can't be confused with an empty string.
+copy_null = r"\N"
+
+
+def local_engine(path=":memory:"):
+    """
+    Local SQLite engine to stand in for Postgres.
+
+    Args:
+        path (str, optional): Database file. Defaults to in memory.
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    return create_engine(f"sqlite:///{path}")
+
+
+def quote(identifier):
+    """
+    Quotes a table or column name the same way pandas does.
+    """
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def prepare_table(df, table_name, connection, if_exists="append"):
+    """
+    Creates, replaces or checks the table a dataframe is written to.
+
+    Args:
+        df (Dataframe): Data to be written.
+        table_name (str): Name of the table.
+        connection (SQLAlchemy Connection)
+        if_exists (str, optional): "append", "replace" or "fail",
+                                   same as DataFrame.to_sql.
+
+    Raises:
+        ValueError: If the table exists and if_exists is "fail".
+    """
+    exists = inspect(connection).has_table(table_name)
+    if exists and if_exists == "fail":
+        raise ValueError(f"Table '{table_name}' already exists.")
+    if exists and if_exists == "replace":
+        connection.execute(text(f"DROP TABLE {quote(table_name)}"))
+        exists = False
+    if not exists:
+        schema = pd.io.sql.get_schema(df, table_name, con=connection)
+        connection.execute(text(schema))
+
+
+def integer_columns(table_name, connection):
+    """
+    Names of the integer columns of an existing table.
+    """
+    return {
+        column["name"]
+        for column in inspect(connection).get_columns(table_name)
+        if isinstance(column["type"], Integer)
+    }
+
+
+def match_integer_columns(df, columns):
+    """
+    Casts float columns bound for integer table columns to Int64.
+    A NaN turns an integer column into float64, whose values to_csv
+    writes as "5.0", which COPY rejects for an integer column.
+
+    Args:
+        df (Dataframe): Data to be written.
+        columns (set of str): Integer columns of the target table.
+
+    Returns:
+        Dataframe
+    """
+    casts = {
+        column: "Int64"
+        for column in df.columns
+        if column in columns and pd.api.types.is_float_dtype(df[column])
+    }
+    return df.astype(casts) if casts else df
+
+
+def copy_buffers(df, table_name, connection, chunksize=100000):
+    """
+    Serializes a dataframe as csv for COPY into an existing table,
+    chunksize rows at a time to keep the buffer small.
+
+    Args:
+        df (Dataframe): Data to be written.
+        table_name (str): Name of the table.
+        connection (SQLAlchemy Connection)
+        chunksize (int, optional): Rows per buffer.
+
+    Yields:
+        StringIO: Csv rows without a header, nulls as copy_null.
+    """
+    columns = integer_columns(table_name, connection)
+    for start in range(0, df.shape[0], chunksize):
+        buffer = io.StringIO()
+        match_integer_columns(
+            df.iloc[start : start + chunksize], columns
+        ).to_csv(buffer, index=False, header=False, na_rep=copy_null)
+        buffer.seek(0)
+        yield buffer
+
+
+def copy_frame(df, table_name, connection, chunksize=100000):
+    """
+    Streams a dataframe into an existing Postgres table with COPY.
+
+    Args:
+        df (Dataframe): Data to be written.
+        table_name (str): Name of the table.
+        connection (SQLAlchemy Connection): Postgres connection.
+        chunksize (int, optional): Rows per COPY buffer.
+    """
+    columns = ", ".join(quote(column) for column in df.columns)
+    query = (
+        f"COPY {quote(table_name)} ({columns}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{copy_null}')"
+    )
+    cursor = connection.connection.cursor()
+    try:
+        for buffer in copy_buffers(df, table_name, connection, chunksize):
+            cursor.copy_expert(query, buffer)
+    finally:
+        cursor.close()
+
+
+def write_frame(df, table_name, con, if_exists="append", chunksize=100000):
+    """
+    Drop in replacement for df.to_sql(table_name, con, index=False, ...).
+    Uses COPY on Postgres and to_sql anywhere else.
+
+    Args:
+        df (Dataframe): Data to be written.
+        table_name (str): Name of the table.
+        con (SQLAlchemy Engine or Connection): When a connection is
+            passed the write joins its open transaction.
+        if_exists (str, optional): "append", "replace" or "fail".
+                                   Defaults to "append".
+        chunksize (int, optional): Rows per write. Defaults to 100000.
+    """
+    if isinstance(con, Engine):
+        with con.begin() as connection:
+            write_frame(df, table_name, connection, if_exists, chunksize)
+        return
+    if con.dialect.name != "postgresql":
+        df.to_sql(
+            table_name,
+            con=con,
+            index=False,
+            if_exists=if_exists,
+            chunksize=chunksize,
+        )
+        return
+    prepare_table(df, table_name, con, if_exists)
+    copy_frame(df, table_name, con, chunksize)
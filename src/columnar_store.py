@@ -0,0 +1,159 @@
+"""
+Local columnar (Parquet) storage for the ETL splits.
+
+Alternative to round tripping every split through Postgres over JDBC.
+Each table lives in its own directory with a stable layout:
+
+    {base_path}/{table_name}/[review_year=YYYY/]part-*.parquet
+
+Tables that carry review_date are partitioned by review_year so
+readers can prune whole directories. All readers take a column list
+so only the requested columns are ever decoded.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+columnar_base_path = "/home/ubuntu/yelp_2021/data/columnar/"
+
+# Partition columns for each table written by the ETL.
+# Empty list means the table is written unpartitioned.
+table_partitions = {
+    "text_data_train": [],
+    "text_data_test": [],
+    "non_text_data_train": ["review_year"],
+    "non_text_data_test": ["review_year"],
+    "holdout_data": ["review_year"],
+}
+
+
+def table_path(table_name, base_path=columnar_base_path):
+    """
+    Returns the directory a table is stored in.
+
+    Args:
+        table_name (str): Name of the table.
+        base_path (str, optional): Root of the columnar store.
+
+    Returns:
+        str: Directory path of the table.
+    """
+    return os.path.join(base_path, table_name)
+
+
+def write_spark_table(
+    df, table_name, mode="overwrite", base_path=columnar_base_path
+):
+    """
+    Saves a Spark dataframe as a Parquet table.
+
+    Args:
+        df (Spark Dataframe): Data to save.
+        table_name (str): Name of the table.
+        mode (str, optional): Spark save mode. Defaults to "overwrite".
+        base_path (str, optional): Root of the columnar store.
+    """
+    partition_cols = table_partitions.get(table_name, [])
+    if "review_year" in partition_cols:
+        df = df.selectExpr("*", "year(review_date) AS review_year")
+    writer = df.write.mode(mode).option("compression", "snappy")
+    if partition_cols:
+        writer = writer.partitionBy(*partition_cols)
+    writer.parquet(table_path(table_name, base_path))
+
+
+def write_pandas_table(df, table_name, base_path=columnar_base_path):
+    """
+    Saves a pandas dataframe as an unpartitioned Parquet table,
+    replacing any previous version of the table.
+
+    Args:
+        df (Dataframe): Data to save.
+        table_name (str): Name of the table.
+        base_path (str, optional): Root of the columnar store.
+    """
+    path = table_path(table_name, base_path)
+    os.makedirs(path, exist_ok=True)
+    df.to_parquet(
+        os.path.join(path, "part-00000.parquet"),
+        engine="pyarrow",
+        compression="snappy",
+        index=False,
+    )
+
+
+def read_spark_table(
+    spark, table_name, columns=None, where=None, base_path=columnar_base_path
+):
+    """
+    Loads a Parquet table into Spark.
+    Column selection and the where clause are pushed down to the scan.
+
+    Args:
+        spark (SparkSession): Active Spark session.
+        table_name (str): Name of the table.
+        columns (list of str, optional): Columns to load. Defaults to all.
+        where (str, optional): Spark SQL filter expression.
+        base_path (str, optional): Root of the columnar store.
+
+    Returns:
+        Spark Dataframe: Requested columns and rows of the table.
+    """
+    df = spark.read.parquet(table_path(table_name, base_path))
+    if where is not None:
+        df = df.where(where)
+    if columns is not None:
+        df = df.select(*columns)
+    return df
+
+
+def read_pandas_table(
+    table_name, columns=None, filters=None, base_path=columnar_base_path
+):
+    """
+    Loads a Parquet table into pandas.
+
+    Args:
+        table_name (str): Name of the table.
+        columns (list of str, optional): Columns to load. Defaults to all.
+        filters (list of tuples, optional): Pyarrow filters,
+            e.g. [("review_year", ">=", 2018)].
+        base_path (str, optional): Root of the columnar store.
+
+    Returns:
+        Dataframe: Requested columns and rows of the table.
+    """
+    return pd.read_parquet(
+        table_path(table_name, base_path),
+        engine="pyarrow",
+        columns=columns,
+        filters=filters,
+    )
+
+
+def iter_pandas_table(
+    table_name, columns=None, chunksize=100000, base_path=columnar_base_path
+):
+    """
+    Streams a Parquet table into pandas one chunk at a time.
+    Drop in replacement for pd.read_sql(..., chunksize=chunksize).
+
+    Args:
+        table_name (str): Name of the table.
+        columns (list of str, optional): Columns to load. Defaults to all.
+        chunksize (int, optional): Max records per chunk.
+        base_path (str, optional): Root of the columnar store.
+
+    Yields:
+        Dataframe: Next chunk of the table.
+    """
+    dataset = ds.dataset(
+        table_path(table_name, base_path),
+        format="parquet",
+        partitioning="hive",
+    )
+    for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+        if batch.num_rows:
+            yield batch.to_pandas()
@@ -0,0 +1,97 @@
+"""
+Elite year bitmasks.
+
+A user's elite years are stored as one integer with bit i set when the
+user was elite in first_elite_year + i. The elite string is parsed once
+per user, and every per review elite feature becomes a couple of
+vectorized bit operations and table lookups on the masks.
+
+The 1_ETL_Spark user table stores the same mask as elite_mask.
+"""
+
+import numpy as np
+import pandas as pd
+
+first_elite_year = 2004
+last_elite_year = 2021
+elite_year_bits = last_elite_year - first_elite_year + 1
+
+# Popcount and highest set bit of every possible mask.
+# 2**18 entries, so lookups replace per element bit loops.
+_all_masks = np.arange(2**elite_year_bits, dtype=np.int32)
+popcount_table = np.zeros(_all_masks.shape, dtype=np.int8)
+highest_bit_table = np.full(_all_masks.shape, -1, dtype=np.int8)
+for _bit in range(elite_year_bits):
+    _is_set = ((_all_masks >> _bit) & 1).astype(bool)
+    popcount_table += _is_set
+    highest_bit_table[_is_set] = _bit
+
+
+def parse_elite(elite):
+    """
+    Converts a single elite string to a mask.
+    The 2020 entry split as "20,20" in the 2021 dataset is repaired,
+    and years outside first_elite_year - last_elite_year are ignored.
+
+    Args:
+        elite (str): Comma separated years, e.g. "2018,2019".
+                     "", "None" or None for never elite.
+
+    Returns:
+        int: Elite year mask.
+    """
+    if elite in ["None", None, ""]:
+        return 0
+    mask = 0
+    for year in elite.replace("20,20", "2020").split(","):
+        if year.isdigit() and first_elite_year <= int(year) <= last_elite_year:
+            mask |= 1 << (int(year) - first_elite_year)
+    return mask
+
+
+def elite_masks(elite):
+    """
+    Masks of a column of elite strings.
+    Each distinct string is parsed once, however many reviews share it.
+
+    Args:
+        elite (Series of str): Elite strings, one per review.
+
+    Returns:
+        array of int32: Elite year mask per review.
+    """
+    codes, uniques = pd.factorize(elite.fillna(""))
+    unique_masks = np.array([parse_elite(u) for u in uniques], dtype=np.int32)
+    return unique_masks[codes]
+
+
+def masks_through_year(masks, years):
+    """
+    Keeps only the elite years up to and including each year.
+
+    Args:
+        masks (array of int): Elite year masks.
+        years (int or array of int): Last year to keep, per mask.
+
+    Returns:
+        array of int32
+    """
+    bits = np.clip(
+        np.asarray(years) - first_elite_year + 1, 0, elite_year_bits
+    )
+    return np.asarray(masks, dtype=np.int32) & ((1 << bits) - 1)
+
+
+def elite_count(masks):
+    """
+    Number of elite years in each mask.
+    """
+    return popcount_table[masks].astype(np.int64)
+
+
+def most_recent_elite(masks):
+    """
+    Most recent elite year in each mask. 0 for masks with no years.
+    """
+    highest_bit = highest_bit_table[masks].astype(np.int64)
+    return np.where(highest_bit < 0, 0, highest_bit + first_elite_year)
@@ -0,0 +1,369 @@
+"""
+Catalog of the model ready dataset columns.
+
+One place for the names, dtypes and feature groups of the columns
+exported by 3_ETL_Combine_Processed_Text_Data.sql. The model scripts
+load only the columns of the feature group they use:
+
+    review_id   - id of the review.
+    target_clf  - classification target (bool).
+    target_reg  - regression target.
+    features    - the columns of a feature group, see feature_groups.
+
+3.1_ETL_Export_Model_Ready_Data.py saves each split as an uncompressed
+Feather (Arrow IPC) file with one record batch. Loading a feather file
+memory maps it and only touches the requested columns, whose numeric
+buffers are handed to pandas without a copy.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+id_column = "review_id"
+target_columns = ["target_clf", "target_reg"]
+
+# Spacy tags, in the order the linguistic features were exported.
+pos_tags = [
+    "adj",
+    "adp",
+    "adv",
+    "aux",
+    "conj",
+    "det",
+    "intj",
+    "noun",
+    "num",
+    "part",
+    "pron",
+    "propn",
+    "punct",
+    "sconj",
+    "sym",
+    "verb",
+    "x",
+]
+dep_tags = [
+    "root",
+    "acl",
+    "acomp",
+    "advcl",
+    "advmod",
+    "agent",
+    "amod",
+    "appos",
+    "attr",
+    "aux",
+    "auxpass",
+    "case",
+    "cc",
+    "ccomp",
+    "compound",
+    "conj",
+    "csubj",
+    "csubjpass",
+    "dative",
+    "dep",
+    "det",
+    "dobj",
+    "expl",
+    "intj",
+    "mark",
+    "meta",
+    "neg",
+    "nmod",
+    "npadvmod",
+    "nsubj",
+    "nsubjpass",
+    "nummod",
+    "oprd",
+    "parataxis",
+    "pcomp",
+    "pobj",
+    "poss",
+    "preconj",
+    "predet",
+    "prep",
+    "prt",
+    "punct",
+    "quantmod",
+    "relcl",
+    "xcomp",
+]
+ent_types = [
+    "cardinal",
+    "date",
+    "event",
+    "fac",
+    "gpe",
+    "language",
+    "law",
+    "loc",
+    "money",
+    "norp",
+    "ordinal",
+    "org",
+    "percent",
+    "person",
+    "product",
+    "quantity",
+    "time",
+    "work_of_art",
+]
+
+feature_groups = {}
+feature_groups["submodels"] = [
+    "nb_prob",
+    "svm_pred",
+    "ft_prob",
+    "lda_t1",
+    "lda_t2",
+    "lda_t3",
+    "lda_t4",
+    "lda_t5",
+]
+feature_groups["other"] = [
+    "review_stars",
+    "grade_level",
+    "polarity",
+    "subjectivity",
+]
+feature_groups["basic_text"] = [
+    "word_cnt",
+    "character_cnt",
+    "num_cnt",
+    "uppercase_cnt",
+    "#@_cnt",
+    "sentence_cnt",
+    "lexicon_cnt",
+    "syllable_cnt",
+    "avg_word_len",
+    "token_cnt",
+    "stopword_cnt",
+    "stopword_pct",
+    "ent_cnt",
+    "ent_pct",
+]
+feature_groups["spacy_linguistic"] = [
+    f"{prefix}_{tag}_{stat}"
+    for prefix, tags in [
+        ("pos", pos_tags),
+        ("dep", dep_tags),
+        ("ent", ent_types),
+    ]
+    for tag in tags
+    for stat in ["pct", "cnt"]
+]
+# Top 15 features chosen from the feature selection steps.
+feature_groups["top_features"] = [
+    "svm_pred",
+    "ft_prob",
+    "nb_prob",
+    "token_cnt",
+    "review_stars",
+    "polarity",
+    "subjectivity",
+    "grade_level",
+    "character_cnt",
+    "avg_word_len",
+    "lda_t1",
+    "lda_t2",
+    "lda_t3",
+    "lda_t4",
+    "lda_t5",
+]
+feature_groups["all"] = (
+    feature_groups["submodels"]
+    + feature_groups["other"]
+    + feature_groups["basic_text"]
+    + feature_groups["spacy_linguistic"]
+)
+feature_groups["non_linguistic"] = (
+    feature_groups["submodels"]
+    + feature_groups["other"]
+    + feature_groups["basic_text"]
+)
+# PCA components are fit on all features.
+feature_groups["pca"] = feature_groups["all"]
+
+# Counts fit in int16, everything else is a float32 score or percent.
+datatypes = {"target_reg": "int16"}
+for column in feature_groups["all"]:
+    is_count = column.endswith("_cnt") or column == "review_stars"
+    datatypes[column] = "int16" if is_count else "float32"
+
+
+def feature_columns(feature_group="all"):
+    """
+    Feature columns of a feature group.
+
+    Args:
+        feature_group (str, optional): Key of feature_groups.
+                                       Defaults to "all".
+
+    Returns:
+        list of str
+    """
+    if feature_group not in feature_groups:
+        raise ValueError(
+            f"Unknown feature group {feature_group!r}, "
+            f"options: {', '.join(feature_groups)}"
+        )
+    return list(feature_groups[feature_group])
+
+
+def load_columns(feature_group="all"):
+    """
+    Columns to load for a feature group: id, targets and features.
+
+    Args:
+        feature_group (str, optional): Key of feature_groups.
+                                       Defaults to "all".
+
+    Returns:
+        list of str
+    """
+    return [id_column] + target_columns + feature_columns(feature_group)
+
+
+def read_model_ready_csv(filepath, feature_group="all", nrows=None):
+    """
+    Loads a model ready csv, parsing only the columns of a feature group.
+
+    Args:
+        filepath (str): Path of train.csv or test.csv.
+        feature_group (str, optional): Key of feature_groups.
+                                       Defaults to "all".
+        nrows (int, optional): Max records to load. Defaults to all.
+
+    Returns:
+        Dataframe: load_columns(feature_group), in that order.
+    """
+    columns = load_columns(feature_group)
+    df = pd.read_csv(
+        filepath,
+        usecols=columns,
+        nrows=nrows,
+        true_values=["True"],
+        false_values=["False"],
+        dtype={c: datatypes[c] for c in columns if c in datatypes},
+    )
+    return df[columns]
+
+
+def model_ready_frame(chunk):
+    """
+    Puts a chunk of the model ready data in catalog column order and dtypes.
+    target_clf arrives as bool from a csv and as "True"/"False" text
+    from Postgres, both are converted to bool.
+
+    Args:
+        chunk (Dataframe): Contains at least load_columns().
+
+    Returns:
+        Dataframe
+    """
+    chunk = chunk[load_columns()].astype(datatypes)
+    chunk["target_clf"] = chunk["target_clf"].astype(str) == "True"
+    return chunk
+
+
+def write_model_ready_feather(chunks, filepath):
+    """
+    Saves the model ready data of a split as a feather file.
+    Chunks are streamed to a temporary file first, then rewritten as a
+    single record batch so every column is contiguous on disk. Peak
+    memory is one copy of the finished dataset, not several.
+
+    Args:
+        chunks (iterable of Dataframes): The split, chunk by chunk.
+        filepath (str): Path of the feather file, e.g. train.feather.
+
+    Returns:
+        int: Records written.
+    """
+    temp_path = f"{filepath}.tmp"
+    schema = None
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(
+                model_ready_frame(chunk), schema=schema, preserve_index=False
+            )
+            if writer is None:
+                schema = table.schema.remove_metadata()
+                table = table.replace_schema_metadata()
+                writer = pa.ipc.new_file(temp_path, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"No records to write to {filepath}.")
+
+    with pa.memory_map(temp_path) as source:
+        table = pa.ipc.open_file(source).read_all().combine_chunks()
+        rows = table.num_rows
+        feather.write_feather(
+            table, filepath, compression="uncompressed", chunksize=rows
+        )
+        del table
+    os.remove(temp_path)
+    return rows
+
+
+def read_model_ready_feather(filepath, feature_group="all", nrows=None):
+    """
+    Loads a model ready feather file, reading only the columns of a
+    feature group. The file is memory mapped, so only those columns
+    are read from disk.
+
+    Args:
+        filepath (str): Path of train.feather or test.feather.
+        feature_group (str, optional): Key of feature_groups.
+                                       Defaults to "all".
+        nrows (int, optional): Max records to load. Defaults to all.
+
+    Returns:
+        Dataframe: load_columns(feature_group), in that order.
+                   Numeric columns are read only views of the file.
+    """
+    table = feather.read_table(
+        filepath, columns=load_columns(feature_group), memory_map=True
+    )
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    return table.to_pandas(split_blocks=True)
+
+
+def read_model_ready(
+    filepath_prefix,
+    split,
+    feature_group="all",
+    nrows=None,
+    data_format="feather",
+):
+    """
+    Loads a split of the model ready data.
+
+    Args:
+        filepath_prefix (str): Directory of the model ready files.
+        split (str): "train" or "test".
+        feature_group (str, optional): Key of feature_groups.
+                                       Defaults to "all".
+        nrows (int, optional): Max records to load. Defaults to all.
+        data_format (str, optional): "feather" or "csv".
+                                     Defaults to "feather".
+
+    Returns:
+        Dataframe: load_columns(feature_group), in that order.
+    """
+    if data_format == "feather":
+        return read_model_ready_feather(
+            f"{filepath_prefix}{split}.feather", feature_group, nrows
+        )
+    return read_model_ready_csv(
+        f"{filepath_prefix}{split}.csv", feature_group, nrows
+    )
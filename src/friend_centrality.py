@@ -0,0 +1,208 @@
+"""
+Centrality features of the user friendship graph.
+
+Works on the CSR adjacency from friend_graph.py with sparse matrix and
+numpy operations only, so it scales to the full 2M user graph:
+
+    degree      - exact, from the row pointers.
+    pagerank    - exact, sparse power iteration.
+    betweenness - estimated from breadth first searches out of
+                  k sampled source users (Brandes with sampling).
+    closeness   - estimated from the same sampled searches.
+
+Values follow the networkx definitions for undirected graphs, so a
+graph small enough for networkx gives comparable numbers.
+"""
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import write_pandas_table
+
+# Feature table written by write_centrality_features.
+centrality_table = "user_centrality"
+centrality_columns = [
+    "user_friend_degree_centrality",
+    "user_friend_pagerank",
+    "user_friend_betweenness",
+    "user_friend_closeness",
+]
+
+
+def degree_centrality(adjacency):
+    """
+    Fraction of the other users each user is friends with.
+
+    Args:
+        adjacency (scipy csr_matrix): Undirected friendship adjacency.
+
+    Returns:
+        array of float64
+    """
+    node_count = adjacency.shape[0]
+    degree = np.diff(adjacency.indptr).astype(np.float64)
+    return degree / max(node_count - 1, 1)
+
+
+def pagerank(adjacency, alpha=0.85, tol=1e-6, max_iter=100):
+    """
+    PageRank by power iteration. Users without friends spread
+    their rank evenly over all users, as in networkx.
+
+    Args:
+        adjacency (scipy csr_matrix): Friendship adjacency.
+        alpha (float, optional): Damping factor. Defaults to 0.85.
+        tol (float, optional): Convergence tolerance, summed over users.
+        max_iter (int, optional): Max iterations. Defaults to 100.
+
+    Returns:
+        array of float64: Sums to 1.
+    """
+    node_count = adjacency.shape[0]
+    out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inverse_degree = np.divide(
+        1.0, out_degree, out=np.zeros(node_count), where=~dangling
+    )
+    transposed = adjacency.T.tocsr()
+    rank = np.full(node_count, 1.0 / node_count)
+    for iteration in range(max_iter):
+        previous = rank
+        rank = alpha * transposed.dot(previous * inverse_degree)
+        rank += (alpha * previous[dangling].sum() + 1 - alpha) / node_count
+        if np.abs(rank - previous).sum() < node_count * tol:
+            break
+    else:
+        print(f"PageRank did not converge in {max_iter} iterations.")
+    return rank
+
+
+def neighbors(adjacency, nodes):
+    """
+    Gathers the neighbors of many nodes at once.
+
+    Args:
+        adjacency (scipy csr_matrix)
+        nodes (array of int)
+
+    Returns:
+        tuple of arrays: Node each edge starts at and its neighbor.
+    """
+    starts = adjacency.indptr[nodes]
+    counts = adjacency.indptr[nodes + 1] - starts
+    edge_starts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    positions = edge_starts + np.arange(counts.sum())
+    return np.repeat(nodes, counts), adjacency.indices[positions]
+
+
+def sampled_path_centrality(adjacency, k=1000, seed=42):
+    """
+    Estimates betweenness and closeness from breadth first searches
+    out of k sampled sources. Each search is level synchronous:
+    a whole frontier is expanded with one gather, so the cost per
+    source is a handful of numpy passes over the edges.
+
+    Args:
+        adjacency (scipy csr_matrix): Undirected friendship adjacency.
+        k (int, optional): Number of sampled sources. Defaults to 1000.
+        seed (int, optional): Random seed for the sample.
+
+    Returns:
+        tuple of arrays: Estimated normalized betweenness and
+                         Wasserman-Faust closeness of every user.
+    """
+    node_count = adjacency.shape[0]
+    k = min(k, node_count)
+    sources = np.random.default_rng(seed).choice(
+        node_count, size=k, replace=False
+    )
+    betweenness = np.zeros(node_count)
+    reached = np.zeros(node_count)
+    distance_sum = np.zeros(node_count)
+    for source in sources:
+        distance = np.full(node_count, -1, dtype=np.int32)
+        paths = np.zeros(node_count)
+        distance[source] = 0
+        paths[source] = 1
+        levels = [np.array([source])]
+        # Forward: distances and shortest path counts, level by level.
+        while True:
+            start, end = neighbors(adjacency, levels[-1])
+            depth = len(levels)
+            new = end[distance[end] == -1]
+            distance[new] = depth
+            on_path = distance[end] == depth
+            paths += np.bincount(
+                end[on_path],
+                weights=paths[start[on_path]],
+                minlength=node_count,
+            )
+            frontier = np.unique(new)
+            if frontier.size == 0:
+                break
+            levels.append(frontier)
+        # Backward: dependency of the source on each user.
+        dependency = np.zeros(node_count)
+        for depth in range(len(levels) - 1, 0, -1):
+            start, end = neighbors(adjacency, levels[depth - 1])
+            on_path = distance[end] == depth
+            start, end = start[on_path], end[on_path]
+            dependency += np.bincount(
+                start,
+                weights=paths[start] / paths[end] * (1 + dependency[end]),
+                minlength=node_count,
+            )
+        dependency[source] = 0
+        betweenness += dependency
+        found = distance > 0
+        reached += found
+        distance_sum += np.where(found, distance, 0)
+
+    if node_count > 2:
+        betweenness *= node_count / (k * (node_count - 1) * (node_count - 2))
+    # Sources can't reach themselves, so they were sampled one less time.
+    samples = np.full(node_count, k)
+    samples[sources] -= 1
+    closeness = np.divide(
+        reached * reached,
+        samples * distance_sum,
+        out=np.zeros(node_count),
+        where=distance_sum > 0,
+    )
+    return betweenness, closeness
+
+
+def centrality_features(adjacency, user_ids, k=1000, seed=42):
+    """
+    All centrality features of every user.
+
+    Args:
+        adjacency (scipy csr_matrix): Undirected friendship adjacency.
+        user_ids (array of str): user_id of each node.
+        k (int, optional): Sampled sources for the path based features.
+        seed (int, optional): Random seed for the sample.
+
+    Returns:
+        Dataframe: user_id and centrality_columns.
+    """
+    betweenness, closeness = sampled_path_centrality(adjacency, k, seed)
+    values = [
+        degree_centrality(adjacency),
+        pagerank(adjacency),
+        betweenness,
+        closeness,
+    ]
+    features = pd.DataFrame(dict(zip(centrality_columns, values)))
+    features.insert(0, "user_id", user_ids)
+    return features
+
+
+def write_centrality_features(features):
+    """
+    Saves the centrality features to the columnar store,
+    where the ETL joins them onto reviews by user_id.
+
+    Args:
+        features (Dataframe): Output of centrality_features.
+    """
+    write_pandas_table(features, centrality_table)
@@ -0,0 +1,170 @@
+"""
+Compact user friendship graph.
+
+Users are interned to dense int32 node ids in the order they are read,
+and friend lists are streamed chunk by chunk straight into the rows of
+a CSR adjacency matrix. Only the node index, the row pointers and one
+chunk of edges are held in memory while building; the column indices
+are appended to disk as they are produced.
+
+A saved graph is a directory holding:
+
+    user_ids.npy  - user_id of each node, fixed width bytes.
+    indptr.npy    - CSR row pointers, int64 from 2**31 edges on.
+    indices.npy   - CSR column indices, node ids in the dtype of indptr.
+
+load_friend_graph memory maps the arrays, so a saved graph can be
+reused without reading it into memory.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from scipy import sparse
+
+
+def build_user_index(chunks):
+    """
+    Interns user_ids to node ids in the order they are read.
+
+    Args:
+        chunks (iterable of Dataframes): Chunks with a user_id column.
+
+    Returns:
+        pandas Index: user_id of each node. Node id = position.
+    """
+    user_ids = np.concatenate(
+        [chunk["user_id"].to_numpy(dtype=object) for chunk in chunks]
+    )
+    user_index = pd.Index(user_ids)
+    if not user_index.is_unique:
+        raise ValueError("user_id is not unique.")
+    return user_index
+
+
+def chunk_edges(chunk, user_index):
+    """
+    Converts the friends strings of a chunk to node ids.
+    Friends missing from the index, and "None", are dropped.
+
+    Args:
+        chunk (Dataframe): Contains friends, comma separated user_ids.
+        user_index (pandas Index): Output of build_user_index.
+
+    Returns:
+        tuple of arrays: Friend count per row (int64) and the
+                         sorted friend node ids of every row (int32).
+    """
+    friends = chunk["friends"].reset_index(drop=True).str.split(", ")
+    friends = friends.explode()
+    rows = friends.index.to_numpy()
+    targets = user_index.get_indexer(friends.to_numpy())
+    known = targets >= 0
+    rows, targets = rows[known], targets[known]
+    order = np.lexsort((targets, rows))
+    degree = np.bincount(rows, minlength=chunk.shape[0])
+    return degree, targets[order].astype(np.int32)
+
+
+def build_friend_graph(load_chunks, path):
+    """
+    Builds the friendship adjacency of every user and saves it to path.
+    Reads the source twice: once for the user_ids only and once for
+    the friends lists, in the same order both times.
+
+    Args:
+        load_chunks (callable): load_chunks(columns) returns an iterator
+            of Dataframes with the requested columns in a stable order,
+            e.g. a keyset_chunks call ordered by user_id.
+        path (str): Directory to save the graph to.
+
+    Returns:
+        tuple: Adjacency (scipy csr_matrix) and user_ids (array of str),
+               memory mapped from path.
+    """
+    os.makedirs(path, exist_ok=True)
+    user_index = build_user_index(load_chunks(["user_id"]))
+    node_count = len(user_index)
+
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    indices_path = os.path.join(path, "indices.bin")
+    row = 0
+    with open(indices_path, "wb") as indices_file:
+        for chunk in load_chunks(["user_id", "friends"]):
+            first_node = user_index.get_loc(chunk["user_id"].iloc[0])
+            if first_node != row:
+                raise ValueError(
+                    "Chunks were not read in the same order as the users."
+                )
+            degree, targets = chunk_edges(chunk, user_index)
+            row_ends = indptr[row] + np.cumsum(degree)
+            indptr[row + 1 : row + 1 + len(degree)] = row_ends
+            indices_file.write(targets.tobytes())
+            row += len(degree)
+
+    # Rewrap the raw indices as an npy file so they can be memory mapped.
+    # indices and indptr share a dtype, so scipy uses both without a copy.
+    edge_count = int(indptr[-1])
+    index_dtype = np.int32 if edge_count < 2**31 else np.int64
+    raw_indices = np.memmap(
+        indices_path, dtype=np.int32, mode="r", shape=(edge_count,)
+    )
+    indices = open_memmap(
+        os.path.join(path, "indices.npy"),
+        mode="w+",
+        dtype=index_dtype,
+        shape=(edge_count,),
+    )
+    indices[:] = raw_indices
+    indices.flush()
+    del raw_indices, indices
+    os.remove(indices_path)
+    np.save(os.path.join(path, "indptr.npy"), indptr.astype(index_dtype))
+    np.save(
+        os.path.join(path, "user_ids.npy"),
+        user_index.to_numpy().astype("S"),
+    )
+    print(f"Friend graph saved: {node_count} users, {edge_count} edges.")
+    return load_friend_graph(path)
+
+
+def load_friend_graph(path, mmap_mode="r"):
+    """
+    Loads a graph saved by build_friend_graph.
+
+    Args:
+        path (str): Directory the graph was saved to.
+        mmap_mode (str, optional): np.load mmap_mode. Defaults to "r",
+            None reads the arrays into memory.
+
+    Returns:
+        tuple: Adjacency (scipy csr_matrix) and user_ids (array of str).
+    """
+    indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(path, "indices.npy"), mmap_mode=mmap_mode)
+    user_ids = np.load(os.path.join(path, "user_ids.npy"))
+    node_count = len(user_ids)
+    data = np.ones(len(indices), dtype=np.float32)
+    adjacency = sparse.csr_matrix(
+        (data, indices, indptr), shape=(node_count, node_count), copy=False
+    )
+    return adjacency, user_ids.astype(str)
+
+
+def symmetrize(adjacency):
+    """
+    Undirected version of an adjacency, i.e. an edge in either
+    direction becomes an edge in both. Yelp lists most friendships
+    from both sides, but not all.
+
+    Args:
+        adjacency (scipy csr_matrix)
+
+    Returns:
+        scipy csr_matrix
+    """
+    undirected = adjacency.maximum(adjacency.T).tocsr()
+    undirected.sort_indices()
+    return undirected
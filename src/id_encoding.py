@@ -0,0 +1,185 @@
+"""
+Dense integer keys for the Yelp ids.
+
+review_id, user_id and business_id are 22 character strings. The ETL
+replaces them with dense int64 keys (0, 1, 2, ...) so every downstream
+table is keyed, joined and paged on integers. The string ids are kept
+only in one map table per id, e.g. review_id_map(review_id, review_key),
+and are looked up again at export with decode_ids.
+
+Keys are never reassigned. Incremental runs give new ids the keys
+after the largest existing key.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import columnar_base_path, read_pandas_table, table_path
+
+id_columns = ["review_id", "user_id", "business_id"]
+
+
+def key_name(id_column):
+    """
+    Name of the key column of an id, e.g. review_id -> review_key.
+    """
+    return id_column.replace("_id", "_key")
+
+
+def id_map_table(id_column):
+    """
+    Name of the map table of an id, e.g. review_id -> review_id_map.
+    """
+    return f"{id_column}_map"
+
+
+def read_spark_id_map(spark, id_column, base_path=columnar_base_path):
+    """
+    Loads a saved id map into Spark.
+
+    Args:
+        spark (SparkSession): Active Spark session.
+        id_column (str): One of id_columns.
+        base_path (str, optional): Root of the columnar store.
+
+    Returns:
+        Spark Dataframe or None: None if the map has not been saved yet.
+    """
+    path = table_path(id_map_table(id_column), base_path)
+    if not os.path.exists(path):
+        return None
+    return spark.read.parquet(path)
+
+
+def build_spark_id_map(df, id_column, existing=None):
+    """
+    Keys every distinct id of id_column in df. Ids already in the
+    existing map keep their key, new ids get dense keys after the
+    existing ones in sorted id order, so the same ids always get the
+    same keys. Only the id column is read, and the keys are assigned
+    in the JVM.
+
+    The map is checkpointed, which materializes it and cuts its
+    lineage. Joining it onto the data and saving it both use the same
+    keys, and saving it never re-reads the source. This also holds
+    when the map is appended to the table existing was read from.
+
+    Args:
+        df (Spark Dataframe): Contains id_column.
+        id_column (str): One of id_columns.
+        existing (Spark Dataframe, optional): Map from earlier runs.
+
+    Returns:
+        tuple: Map of every id in df and existing, and
+               the map of the newly keyed ids only.
+    """
+    from pyspark.sql import Window
+    from pyspark.sql import functions as F
+
+    key_column = key_name(id_column)
+    ids = df.select(id_column).where(F.col(id_column).isNotNull()).distinct()
+    start = 0
+    if existing is not None:
+        existing = existing.select(id_column, key_column)
+        ids = ids.join(existing, on=id_column, how="left_anti")
+        max_key = existing.agg(F.max(key_column)).first()[0]
+        start = 0 if max_key is None else max_key + 1
+    # The global window sorts the ids in one partition,
+    # which is fine for a single string column.
+    position = F.row_number().over(Window.orderBy(id_column)) - 1
+    id_map = ids.select(
+        id_column, (position + start).cast("long").alias(key_column)
+    )
+    if existing is not None:
+        id_map = existing.unionByName(id_map)
+    id_map = id_map.localCheckpoint(eager=True)
+    return id_map, id_map.where(F.col(key_column) >= start)
+
+
+def add_spark_keys(df, id_map, id_column):
+    """
+    Adds the key column of id_column from a map built by
+    build_spark_id_map.
+
+    Args:
+        df (Spark Dataframe): Contains id_column.
+        id_map (Spark Dataframe): Map covering every id in df.
+        id_column (str): One of id_columns.
+
+    Returns:
+        Spark Dataframe: df plus the key column.
+    """
+    return df.join(id_map, on=id_column, how="left")
+
+
+def replace_spark_ids(df, id_columns=id_columns):
+    """
+    Swaps id columns for their keys, keeping the column order.
+
+    Args:
+        df (Spark Dataframe): Carries both the ids and their keys.
+        id_columns (list of str, optional): Ids to replace.
+
+    Returns:
+        Spark Dataframe: Keys under the original id column names.
+    """
+    from pyspark.sql import functions as F
+
+    keys = {key_name(id_column): id_column for id_column in id_columns}
+    return df.select(
+        *[
+            F.col(key_name(column)).alias(column)
+            if column in id_columns
+            else F.col(column)
+            for column in df.columns
+            if column not in keys
+        ]
+    )
+
+
+def read_id_map(id_column, base_path=columnar_base_path):
+    """
+    Loads an id map as a lookup array.
+
+    Args:
+        id_column (str): One of id_columns.
+        base_path (str, optional): Root of the columnar store.
+
+    Returns:
+        array of str: Original id at the position of each key.
+    """
+    id_map = read_pandas_table(id_map_table(id_column), base_path=base_path)
+    keys = id_map[key_name(id_column)].to_numpy()
+    lookup = np.empty(keys.max() + 1, dtype=object)
+    lookup[keys] = id_map[id_column].to_numpy()
+    return lookup
+
+
+def decode_ids(keys, lookup):
+    """
+    Looks the original ids of keys back up, e.g. for an export.
+
+    Args:
+        keys (Series or array of int): Integer keys.
+        lookup (array of str): Output of read_id_map.
+
+    Returns:
+        array of str
+    """
+    return lookup[np.asarray(keys)]
+
+
+def encode_ids(ids, lookup):
+    """
+    Keys of original ids, e.g. to key an external table.
+
+    Args:
+        ids (Series or array of str): Original ids.
+        lookup (array of str): Output of read_id_map.
+
+    Returns:
+        array of int64: -1 for ids missing from the map.
+    """
+    return pd.Index(lookup).get_indexer(np.asarray(ids, dtype=object))
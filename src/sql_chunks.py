@@ -0,0 +1,82 @@
+"""
+Chunked table readers.
+
+Paging with LIMIT n OFFSET i*n makes Postgres scan and throw away every
+skipped row, so each chunk is slower than the one before it.
+keyset_chunks resumes each query after the last key seen instead,
+which is a single index range scan per chunk.
+cursor_chunks streams an arbitrary query through a server side cursor
+for queries that have no unique key to page on.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+
+
+def keyset_chunks(
+    engine,
+    table_name,
+    key="review_id",
+    columns=None,
+    chunksize=10000,
+    after=None,
+):
+    """
+    Pages through a table in key order with keyset pagination.
+    Chunk boundaries are the same on every run, so a restarted job
+    can pick up directly after the last completed key.
+
+    Args:
+        engine (SQLAlchemy Engine)
+        table_name (str): Source table name.
+        key (str, optional): Unique, indexed column to page on.
+                             Defaults to "review_id".
+        columns (list of str, optional): Columns to load. Defaults to all.
+        chunksize (int, optional): Max records per chunk.
+        after (optional): Only load keys after this value.
+
+    Yields:
+        Dataframe: Next chunk of the table.
+    """
+    select = "*" if columns is None else ", ".join(columns)
+    last_key = after
+    while True:
+        where = "" if last_key is None else f"WHERE {key} > :last_key"
+        query = text(
+            f"""
+            SELECT {select}
+            FROM {table_name}
+            {where}
+            ORDER BY {key}
+            LIMIT :chunksize
+            """
+        )
+        chunk = pd.read_sql(
+            query,
+            con=engine,
+            params={"last_key": last_key, "chunksize": chunksize},
+        )
+        if chunk.empty:
+            return
+        yield chunk
+        # tolist gives a python scalar, drivers can't bind numpy ints.
+        last_key = chunk[key].iloc[-1:].tolist()[0]
+
+
+def cursor_chunks(engine, query, chunksize=10000):
+    """
+    Streams the results of a query through a server side (named) cursor.
+    Rows are fetched chunksize at a time instead of all at once.
+
+    Args:
+        engine (SQLAlchemy Engine)
+        query (str): Query to run.
+        chunksize (int, optional): Max records per chunk.
+
+    Yields:
+        Dataframe: Next chunk of the results.
+    """
+    with engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        for chunk in pd.read_sql(text(query), connection, chunksize=chunksize):
+            yield chunk
@@ -8,10 +8,16 @@
 # TODO: Convert lng/lat to x,y,z coordinates
 
 
+import os
+import sys
 import pandas as pd
 from sqlalchemy import create_engine
 from y1_mongo2sql import save_to_postgres
 
+# Shared modules live in src/.
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from sql_chunks import keyset_chunks
+
 
 class DataCleaningPipeline:
     def __init__(self, df):
@@ -247,15 +253,10 @@ if __name__ == "__main__":
 
     total_chunks = int(row_count / chunksize) + 1
     current_chunk_num = 0
-    for i in range(int(row_count / chunksize) + 1):
-        query = "SELECT * FROM {table_name} LIMIT {chunksize} OFFSET {offset}".format(
-            table_name="restaurant_reviews_final",
-            offset=i * chunksize,
-            chunksize=chunksize,
-        )
-
-        chunk = pd.read_sql(query, con=engine)
-
+    chunks = keyset_chunks(
+        engine, "restaurant_reviews_final", chunksize=chunksize
+    )
+    for chunk in chunks:
         data = DataCleaningPipeline(chunk)
         data.full_run()
 
@@ -81,10 +81,10 @@ class NLPPipeline:
             ent_list: Named Entity
                       https://spacy.io/api/annotation#named-entities
         """
+        # The lemmatizer is the only component no feature uses.
+        nlp = spacy.load("en_core_web_sm", disable=["lemmatizer"])
         for df in [self.X_train, self.X_test]:
-            nlp = spacy.load("en_core_web_sm")
-
-            df["spacy_doc"] = df["review_text"].apply(lambda x: nlp(x))
+            df["spacy_doc"] = list(nlp.pipe(df["review_text"]))
             df["review_text_token_count"] = df["spacy_doc"].apply(
                 lambda x: len(x)
             )
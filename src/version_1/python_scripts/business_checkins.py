@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 
@@ -44,6 +45,48 @@ def counter(x):
         return len(y)
 
 
+def explode_checkins(dates):
+    """
+    Parses every checkin timestamp of every business in one pass.
+
+    Args:
+        dates (Series of str): Comma separated checkin timestamps,
+                               one string per business.
+
+    Returns:
+        tuple of arrays: Row position of the business and
+                         datetime64 timestamp of each checkin.
+    """
+    checkins = dates.reset_index(drop=True).str.split(",").explode()
+    times = pd.to_datetime(checkins.str.strip())
+    valid = times.notna().to_numpy()
+    return checkins.index.to_numpy()[valid], times.to_numpy()[valid]
+
+
+def checkins_before_cutoffs(positions, times, business_count, cutoffs):
+    """
+    Counts each business's checkins before every cut-off date.
+    Each checkin is placed in the interval between two cut-offs with
+    searchsorted, then a cumulative sum over the per business interval
+    histogram gives the counts for all cut-offs at once.
+
+    Args:
+        positions (array of int): Business row position of each checkin.
+        times (array of datetime64): Timestamp of each checkin.
+        business_count (int): Number of businesses.
+        cutoffs (array of datetime64): Sorted cut-off dates.
+
+    Returns:
+        array of int64: Checkin counts, shape (business_count, cutoffs).
+    """
+    bins = len(cutoffs) + 1
+    interval = np.searchsorted(cutoffs, times, side="right")
+    histogram = np.bincount(
+        positions * bins + interval, minlength=business_count * bins
+    ).reshape(business_count, bins)
+    return np.cumsum(histogram, axis=1)[:, :-1]
+
+
 def expand_checkin_data():
     """
     Expands informational value
@@ -57,10 +100,14 @@ def expand_checkin_data():
             """
     df = load_dataframe_from_yelp_2(query)
     df["checkin_count"] = df.date.apply(counter)
-    df["date_list"] = [pd.to_datetime(x) for x in df.date.str.split(",")]
+    positions, times = explode_checkins(df.date)
     df = df.drop("date", axis=1)
-    df["oldest_checkin"] = [min(lst) for lst in df["date_list"]]
-    df["most_recent_checkin"] = [max(lst) for lst in df["date_list"]]
+    by_business = pd.Series(times).groupby(positions)
+    business_positions = np.arange(df.shape[0])
+    df["oldest_checkin"] = by_business.min().reindex(business_positions).values
+    df["most_recent_checkin"] = (
+        by_business.max().reindex(business_positions).values
+    )
 
     month_list = [
         "Jan",
@@ -86,13 +133,19 @@ def expand_checkin_data():
             datetime = pd.to_datetime(date)
             date_comparison_list.append(datetime)
 
+    counts = checkins_before_cutoffs(
+        positions,
+        times,
+        df.shape[0],
+        pd.DatetimeIndex(date_comparison_list).to_numpy(),
+    )
+    checkin_count = df["checkin_count"].to_numpy()
+    columns = {}
     for idx, val in enumerate(date_column_list):
-        df[val] = df.date_list.apply(
-            lambda x: sum(1 if y < date_comparison_list[idx] else 0 for y in x)
-        )
-        df[f"percent_of_{val}"] = df[val] / df["checkin_count"]
+        columns[val] = counts[:, idx]
+        columns[f"percent_of_{val}"] = counts[:, idx] / checkin_count
+    df = pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
 
-    df = df.drop("date_list", axis=1)
     save_dataframe_to_yelp_2(df, "checkin_expanded")
 
 
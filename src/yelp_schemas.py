@@ -0,0 +1,305 @@
+"""
+Schema registry for the five Yelp academic dataset json files.
+
+Passing an explicit schema to spark.read.json skips the schema
+inference pass, which is a full extra scan of each file.
+The field lists are kept library neutral so the pandas based loaders
+can share them without depending on pyspark.
+
+Field types: "string", "long", "double" or a nested field list.
+"""
+
+yelp_files = ["business", "checkin", "review", "tip", "user"]
+
+business_attribute_fields = [
+    (name, "string")
+    for name in [
+        "AcceptsInsurance",
+        "AgesAllowed",
+        "Alcohol",
+        "Ambience",
+        "BYOB",
+        "BYOBCorkage",
+        "BestNights",
+        "BikeParking",
+        "BusinessAcceptsBitcoin",
+        "BusinessAcceptsCreditCards",
+        "BusinessParking",
+        "ByAppointmentOnly",
+        "Caters",
+        "CoatCheck",
+        "Corkage",
+        "DietaryRestrictions",
+        "DogsAllowed",
+        "DriveThru",
+        "GoodForDancing",
+        "GoodForKids",
+        "GoodForMeal",
+        "HairSpecializesIn",
+        "HappyHour",
+        "HasTV",
+        "Music",
+        "NoiseLevel",
+        "Open24Hours",
+        "OutdoorSeating",
+        "RestaurantsAttire",
+        "RestaurantsCounterService",
+        "RestaurantsDelivery",
+        "RestaurantsGoodForGroups",
+        "RestaurantsPriceRange2",
+        "RestaurantsReservations",
+        "RestaurantsTableService",
+        "RestaurantsTakeOut",
+        "Smoking",
+        "WheelchairAccessible",
+        "WiFi",
+    ]
+]
+
+business_hours_fields = [
+    (day, "string")
+    for day in [
+        "Monday",
+        "Tuesday",
+        "Wednesday",
+        "Thursday",
+        "Friday",
+        "Saturday",
+        "Sunday",
+    ]
+]
+
+yelp_fields = {
+    "business": [
+        ("business_id", "string"),
+        ("name", "string"),
+        ("address", "string"),
+        ("city", "string"),
+        ("state", "string"),
+        ("postal_code", "string"),
+        ("latitude", "double"),
+        ("longitude", "double"),
+        ("stars", "double"),
+        ("review_count", "long"),
+        ("is_open", "long"),
+        ("attributes", business_attribute_fields),
+        ("categories", "string"),
+        ("hours", business_hours_fields),
+    ],
+    "checkin": [
+        ("business_id", "string"),
+        ("date", "string"),
+    ],
+    "review": [
+        ("review_id", "string"),
+        ("user_id", "string"),
+        ("business_id", "string"),
+        ("stars", "double"),
+        ("useful", "long"),
+        ("funny", "long"),
+        ("cool", "long"),
+        ("text", "string"),
+        ("date", "string"),
+    ],
+    "tip": [
+        ("user_id", "string"),
+        ("business_id", "string"),
+        ("text", "string"),
+        ("date", "string"),
+        ("compliment_count", "long"),
+    ],
+    "user": [
+        ("user_id", "string"),
+        ("name", "string"),
+        ("review_count", "long"),
+        ("yelping_since", "string"),
+        ("useful", "long"),
+        ("funny", "long"),
+        ("cool", "long"),
+        ("elite", "string"),
+        ("friends", "string"),
+        ("fans", "long"),
+        ("average_stars", "double"),
+        ("compliment_hot", "long"),
+        ("compliment_more", "long"),
+        ("compliment_profile", "long"),
+        ("compliment_cute", "long"),
+        ("compliment_list", "long"),
+        ("compliment_note", "long"),
+        ("compliment_plain", "long"),
+        ("compliment_cool", "long"),
+        ("compliment_funny", "long"),
+        ("compliment_writer", "long"),
+        ("compliment_photos", "long"),
+    ],
+}
+
+pandas_type_names = {"string": "object", "long": "int64", "double": "float64"}
+
+
+def spark_schema(file):
+    """
+    Builds the Spark schema of a Yelp json file.
+
+    Args:
+        file (str): Identifying suffix of yelp json file.
+
+    Returns:
+        StructType: Schema to pass to spark.read.json.
+    """
+    from pyspark.sql.types import (
+        DoubleType,
+        LongType,
+        StringType,
+        StructField,
+        StructType,
+    )
+
+    spark_types = {
+        "string": StringType(),
+        "long": LongType(),
+        "double": DoubleType(),
+    }
+
+    def to_struct(fields):
+        return StructType(
+            [
+                StructField(
+                    name,
+                    to_struct(kind)
+                    if isinstance(kind, list)
+                    else spark_types[kind],
+                    True,
+                )
+                for name, kind in fields
+            ]
+        )
+
+    return to_struct(yelp_fields[file])
+
+
+def arrow_schema(file):
+    """
+    Builds the pyarrow schema of a Yelp json file.
+
+    Args:
+        file (str): Identifying suffix of yelp json file.
+
+    Returns:
+        pyarrow Schema: Schema to pass to pyarrow.json readers.
+    """
+    import pyarrow as pa
+
+    arrow_types = {
+        "string": pa.string(),
+        "long": pa.int64(),
+        "double": pa.float64(),
+    }
+
+    def to_fields(fields):
+        return [
+            pa.field(
+                name,
+                pa.struct(to_fields(kind))
+                if isinstance(kind, list)
+                else arrow_types[kind],
+            )
+            for name, kind in fields
+        ]
+
+    return pa.schema(to_fields(yelp_fields[file]))
+
+
+def pandas_dtypes(file):
+    """
+    Pandas dtypes of the top level, non nested fields of a Yelp json file.
+
+    Args:
+        file (str): Identifying suffix of yelp json file.
+
+    Returns:
+        dict: Column name to dtype. Usable as pd.read_json(dtype=...).
+    """
+    return {
+        name: pandas_type_names[kind]
+        for name, kind in yelp_fields[file]
+        if not isinstance(kind, list)
+    }
+
+
+def check_columns(file, columns):
+    """
+    Fails fast if a batch of records has drifted from the registry.
+
+    Args:
+        file (str): Identifying suffix of yelp json file.
+        columns (iterable of str): Top level field names found in the data.
+
+    Raises:
+        ValueError: If fields were added to or removed from the file.
+    """
+    expected = {name for name, _ in yelp_fields[file]}
+    found = set(columns)
+    added = sorted(found - expected)
+    missing = sorted(expected - found)
+    if added or missing:
+        raise ValueError(
+            f"Schema drift in {file}.json. "
+            f"Unexpected fields: {added}. Missing fields: {missing}."
+        )
+
+
+def check_spark_sample(spark, file, filepath, sample_size=1000):
+    """
+    Infers the schema of the first records of a Yelp json file
+    and fails fast if it does not match the registry.
+    Only sample_size lines are read, not the whole file.
+
+    Args:
+        spark (SparkSession): Active Spark session.
+        file (str): Identifying suffix of yelp json file.
+        filepath (str): Path to the json file.
+        sample_size (int, optional): Number of lines to check.
+
+    Raises:
+        ValueError: If fields or field types differ from the registry.
+    """
+    from pyspark.sql import functions as F
+
+    sample = spark.read.text(filepath).limit(sample_size)
+    sample = spark.read.json(sample.rdd.map(lambda row: row.value))
+    inferred = sample.schema
+    check_columns(file, inferred.fieldNames())
+    expected = spark_schema(file)
+    # Fields that are null in every sampled record are inferred as
+    # strings whatever their type, so they are not compared.
+    non_null_counts = sample.select(
+        [
+            F.count(F.col(f"`{name}`")).alias(name)
+            for name in inferred.fieldNames()
+        ]
+    ).first()
+    for field in inferred.fields:
+        if non_null_counts[field.name] == 0:
+            continue
+        expected_type = expected[field.name].dataType
+        if expected_type.typeName() == "struct":
+            # Nested fields that are null in every sampled record are
+            # inferred as strings, so only struct samples are compared.
+            if field.dataType.typeName() != "struct":
+                continue
+            added = sorted(
+                set(field.dataType.fieldNames())
+                - set(expected_type.fieldNames())
+            )
+            if added:
+                raise ValueError(
+                    f"Schema drift in {file}.json. "
+                    f"Unexpected fields in {field.name}: {added}."
+                )
+        elif field.dataType != expected_type:
+            raise ValueError(
+                f"Schema drift in {file}.json. Field {field.name} is "
+                f"{field.dataType.simpleString()}, expected "
+                f"{expected_type.simpleString()}."
+            )
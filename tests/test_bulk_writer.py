@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bulk_writer import copy_buffers, local_engine, prepare_table
+
+
+def test_nan_in_later_chunk_keeps_integer_format():
+    first = pd.DataFrame({"review_id": ["a", "b"], "tip_cnt": [1, 2]})
+    second = pd.DataFrame({"review_id": ["c", "d"], "tip_cnt": [5, np.nan]})
+    assert second["tip_cnt"].dtype == "float64"
+
+    engine = local_engine()
+    with engine.begin() as connection:
+        prepare_table(first, "features", connection)
+        rows = [
+            buffer.getvalue().splitlines()
+            for chunk in [first, second]
+            for buffer in copy_buffers(chunk, "features", connection)
+        ]
+
+    assert rows == [["a,1", "b,2"], ["c,5", "d,\\N"]]
+
+
+def test_float_columns_are_left_alone():
+    df = pd.DataFrame({"review_id": ["a", "b"], "pct": [0.5, np.nan]})
+
+    engine = local_engine()
+    with engine.begin() as connection:
+        prepare_table(df, "features", connection)
+        rows = [
+            buffer.getvalue().splitlines()
+            for buffer in copy_buffers(df, "features", connection)
+        ]
+
+    assert rows == [["a,0.5", "b,\\N"]]